@@ -6,6 +6,9 @@ from collections import defaultdict
 import tournament_logic as logic
 import json
 import time
+import datetime
+import csv
+import io
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Admin Panel", page_icon="👑", layout="wide")
@@ -90,7 +93,7 @@ with st.sidebar.expander("Cargar / Guardar Torneo"):
 
     st.subheader("Guardar y Descargar Torneo (.json)")
     # Convert current tournament data to a JSON string for the download button
-    json_string = json.dumps(st.session_state.data, indent=4)
+    json_string = json.dumps(st.session_state.data, indent=4, default=list)  # packed storage keeps match lists as MatchTable
     st.download_button(
         label="📥 Guardar y Descargar Archivo",
         data=json_string,
@@ -100,6 +103,49 @@ with st.sidebar.expander("Cargar / Guardar Torneo"):
     )
 
 
+    st.subheader("Exportar Torneo Completo (.xlsx)")
+    if st.button("📊 Preparar Excel del Torneo", use_container_width=True, disabled=not st.session_state.data):
+        with st.spinner("Generando el archivo..."):
+            st.session_state.tournament_excel, skipped = logic.export_tournament_to_excel(st.session_state.data)
+        if skipped: st.warning(f"No se pudo dibujar el cuadro de: {', '.join(skipped)} (¿está instalado Graphviz?). Se exportaron sin imagen.")
+    if st.session_state.get('tournament_excel'):
+        st.download_button(
+            label="📥 Descargar Torneo Completo",
+            data=st.session_state.tournament_excel,
+            file_name="Torneo Completo.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            use_container_width=True
+        )
+
+
+with st.sidebar.expander("Programar Fixture"):
+    with st.form("schedule_form"):
+        c1, c2 = st.columns(2)
+        courts = c1.number_input("Canchas", 1, 64, 4, 1)
+        rest_slots = c2.number_input("Turnos de descanso", 0, 8, 1, 1)
+        start_time = c1.time_input("Hora de inicio", datetime.time(9, 0), step=900)
+        slot_minutes = c2.number_input("Minutos por turno", 15, 300, 90, 15)
+        slots_per_day = st.number_input("Turnos por día", 1, 24, 8, 1)
+        if st.form_submit_button("🗓️ Generar Fixture", use_container_width=True, disabled=not st.session_state.data):
+            try:
+                st.success(logic.generate_schedule(st.session_state.data, courts, rest_slots, start_time.strftime("%H:%M"), slot_minutes, slots_per_day))
+                save_and_reload()
+            except ValueError as e: st.error(f"Error: {e}")
+
+
+with st.sidebar.expander("🩺 Diagnóstico"):
+    profiling = st.toggle("Medir tiempos", value=logic.instrumentation_enabled())
+    if profiling != logic.instrumentation_enabled():
+        logic.enable_instrumentation() if profiling else logic.disable_instrumentation()
+    stats = logic.get_instrumentation_stats()
+    if stats:
+        st.dataframe(pd.DataFrame(stats).set_index('function').round(2), use_container_width=True)
+        c1, c2 = st.columns(2)
+        c1.download_button("📥 JSON", data=logic.dump_instrumentation(), file_name="diagnostico.json", mime="application/json", use_container_width=True)
+        if c2.button("Reiniciar", use_container_width=True): logic.reset_instrumentation(); st.rerun()
+    elif profiling: st.caption("Usa el panel para acumular mediciones.")
+
+
 # --- Main Page Content ---
 st.title("👑 Panel de Administración")
 cat_data = get_current_category_data()
@@ -108,7 +154,7 @@ if not cat_data:
 
 
 st.header(f"Categoría: {st.session_state.current_category}")
-tab_rosters, tab_main, tab_history, tab_knockout = st.tabs(["👥 Plantillas", "📊 Posiciones", "📜 Historial", "🏆 Fase Eliminatoria"])
+tab_rosters, tab_main, tab_history, tab_players, tab_schedule, tab_knockout = st.tabs(["👥 Plantillas", "📊 Posiciones", "📜 Historial", "🎖️ Jugadores", "🗓️ Fixture", "🏆 Fase Eliminatoria"])
 
 
 with tab_rosters:
@@ -123,6 +169,9 @@ with tab_rosters:
                 st.subheader(f"Grupo {group}")
                 for _, team in teams.iterrows():
                     st.markdown(f"**{team['name']}**: {', '.join(p.title() for p in team['players'])}")
+            ambiguous = logic.get_ambiguous_players(cat_data)
+            if ambiguous:
+                st.warning("Jugadores registrados en más de un equipo: " + "; ".join(f"{p.title()} ({', '.join(t)})" for p, t in ambiguous.items()))
                     
     with col2:
         st.subheader("Agregar Equipo")
@@ -161,12 +210,53 @@ with tab_main:
                     st.rerun()
                 except ValueError as e: st.error(f"Error: {e}")
             else: st.warning("El campo de resultado está vacío.")
+    with st.expander("📋 Importar resultados en bloque", expanded='bulk_import_report' in st.session_state):
+        with st.form("bulk_import_form"):
+            bulk_text = st.text_area("Un resultado por línea", placeholder="Nadal def. Federer 6-4 7-6\nSerena def. Venus 6-2 6-1", height=200)
+            bulk_file = st.file_uploader("O sube un archivo .csv / .txt (un resultado por fila)", type=['csv', 'txt'])
+            if st.form_submit_button("📥 Importar Resultados"):
+                file_rows = []
+                if bulk_file is not None:
+                    # Number each row by the file line it starts on (line_num counts quoted line breaks), so errors point at real rows
+                    reader = csv.reader(io.StringIO(bulk_file.getvalue().decode("utf-8"))); start = 1
+                    for row in reader:
+                        file_rows.append((start, " ".join(cell.strip() for cell in row if cell.strip()))); start = reader.line_num + 1
+                if bulk_text.strip() or any(line for _, line in file_rows):
+                    report = logic.import_group_results(cat_data, bulk_text, file_rows)
+                    if report['applied']: save_and_reload()
+                    st.session_state.bulk_import_report = report
+                    st.rerun()
+                else: st.warning("No hay resultados para importar.")
+        report = st.session_state.pop('bulk_import_report', None)
+        if report:
+            st.success(f"{report['applied']} partidos importados.")
+            for msg in report['completed']: st.info(msg)
+            if report['errors']:
+                st.error(f"{len(report['errors'])} líneas con errores (no se importaron):")
+                st.dataframe(pd.DataFrame(report['errors'], columns=["Origen", "Línea", "Resultado", "Error"]), hide_index=True, use_container_width=True)
     st.subheader("Posiciones de Grupo")
-    standings_df = logic.get_standings_df(cat_data)
-    if not standings_df.empty:
-        for group_name, group_df in standings_df.groupby('Grupo'):
+    group_standings = logic.get_group_standings_dfs(cat_data)
+    if group_standings:
+        for group_name, group_df in group_standings.items():
             st.markdown(f"**Grupo {group_name}**"); st.dataframe(group_df.drop(columns=['Grupo']).set_index('Equipo'), use_container_width=True)
     else: st.info("No hay equipos registrados.")
+    with st.expander("⚖️ Criterios de desempate"):
+        with st.form("ranking_form"):
+            criteria = st.multiselect("En orden de aplicación", list(logic.RANKING_CRITERIA), default=logic.get_ranking_criteria(cat_data), format_func=logic.RANKING_CRITERIA.get)
+            st.caption("Los criterios \"entre empatados\" cuentan solo los resultados entre los equipos que siguen igualados.")
+            if st.form_submit_button("💾 Guardar Criterios"):
+                try: st.success(logic.set_ranking_criteria(cat_data, criteria)); save_and_reload(); st.rerun()
+                except ValueError as e: st.error(f"Error: {e}")
+    with st.expander("🔧 Verificar consistencia de estadísticas"):
+        c1, c2 = st.columns(2)
+        if c1.button("🔍 Verificar Estadísticas", use_container_width=True):
+            report = logic.check_category_consistency(cat_data)
+            if not report['teams'] and report['team_results_match']: st.success("Las estadísticas coinciden con los partidos registrados.")
+            else:
+                if report['teams']: st.dataframe(pd.DataFrame(report['teams'], columns=["Equipo", "Estadística", "Guardado", "Calculado"]), hide_index=True, use_container_width=True)
+                if not report['team_results_match']: st.warning("Los enfrentamientos por equipos no coinciden con los partidos registrados.")
+        if c2.button("♻️ Recalcular Estadísticas", use_container_width=True):
+            st.success(logic.recompute_category(cat_data)); save_and_reload(); st.rerun()
     st.markdown("---")
     
             
@@ -177,9 +267,39 @@ with tab_history:
         for result in reversed(cat_data.get('team_results', [])):
             team1, team2 = result['teams']
             with st.expander(f"**{team1} vs {team2}** | Ganador: **{result['winner']}** ({result.get('score', 'N/A')})"):
-                for m in cat_data['individual_matches']:
-                    if {m['team1'], m['team2']} == {team1, team2}:
-                        st.write(f"• {m['p1']} def. {m['p2']} ({m['set_scores']})")
+                for m in logic.get_matches_between(cat_data, team1, team2):
+                    st.write(f"• {m['p1']} def. {m['p2']} ({m['set_scores']})")
+
+
+with tab_players:
+    st.subheader("Ranking de Jugadores")
+    leaderboard = logic.get_player_leaderboard(cat_data)
+    if not leaderboard: st.info("Aún no hay partidos registrados.")
+    else:
+        st.dataframe(pd.DataFrame(leaderboard, columns=logic.PLAYER_COLUMNS), hide_index=True, use_container_width=True)
+        picked = st.selectbox("Ver detalle de un jugador", range(len(leaderboard)), format_func=lambda i: f"{leaderboard[i]['Jugador']} ({leaderboard[i]['Equipo']})")
+        breakdown = logic.get_player_breakdown(cat_data, leaderboard[picked]['Equipo'], leaderboard[picked]['Jugador'])
+        if breakdown:
+            totals = breakdown['totals']
+            st.caption(f"Singles: {totals['singles_won']}/{totals['singles_played']} ganados · Dobles: {totals['doubles_won']}/{totals['doubles_played']} ganados")
+            col_partners, col_opponents = st.columns(2)
+            with col_partners:
+                st.markdown("**Compañeros de dobles**")
+                if breakdown['partners']: st.dataframe(pd.DataFrame(breakdown['partners']), hide_index=True, use_container_width=True)
+                else: st.info("No jugó dobles.")
+            with col_opponents:
+                st.markdown("**Rivales**")
+                st.dataframe(pd.DataFrame(breakdown['opponents']), hide_index=True, use_container_width=True)
+
+
+with tab_schedule:
+    st.subheader("Fixture de Grupos")
+    schedule_rows = logic.get_schedule_rows(cat_data)
+    if not schedule_rows: st.info("No hay fixture generado. Usa 'Programar Fixture' en el menú lateral.")
+    else:
+        schedule_df = pd.DataFrame(schedule_rows, columns=["Grupo", "Ronda", "Equipo 1", "Equipo 2", "Partido", "Cancha", "Horario", "Estado"])
+        st.caption(f"{(schedule_df['Estado'] == 'Jugado').sum()} de {len(schedule_df)} partidos jugados.")
+        st.dataframe(schedule_df, hide_index=True, use_container_width=True)
 
 
 with tab_knockout:
@@ -243,7 +363,9 @@ with tab_knockout:
         with st.form("generate_knockout_form"):
             c1, c2 = st.columns(2)
             num_advancing = c1.number_input("Equipos que avanzan por grupo", 1, 4, 2, 1)
-            bracket_size = c2.selectbox("Tamaño del cuadro", [4, 8, 16, 32, 64])
+            bracket_size = c2.selectbox("Tamaño del cuadro", [4, 8, 16, 32, 64, 128, 256, 512, 1024])
             if st.form_submit_button("Generar Cuadro"):
-                st.success(logic.generate_knockout_bracket(cat_data, num_advancing, bracket_size))
-                save_and_reload(); st.rerun()
\ No newline at end of file
+                try:
+                    st.success(logic.generate_knockout_bracket(cat_data, num_advancing, bracket_size))
+                    save_and_reload(); st.rerun()
+                except ValueError as e: st.error(f"Error: {e}")
\ No newline at end of file
@@ -0,0 +1,108 @@
+# benchmarks/bench_startup.py
+
+"""
+Cold-start report: times each startup step in fresh interpreters, so import-time and
+first-use regressions show up between releases.
+
+    python benchmarks/bench_startup.py --repeat 5 --server --output startup.json
+
+Steps are timed one after another in the same child process, so each figure includes only
+what that step loaded on top of the previous ones. --server also times `streamlit run`
+until its health endpoint answers, which is what launch.py waits for.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter; prints {step: seconds} as JSON.
+_CHILD = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+timings, last = {}, time.perf_counter()
+def mark(step):
+    global last
+    now = time.perf_counter(); timings[step] = now - last; last = now
+import tournament_logic as logic; mark("import tournament_logic")
+import tournament_feed; mark("import tournament_feed")
+logic.DATA_FILE = sys.argv[2]
+data = logic.load_data(); mark("load_data")
+cat_data = next(iter(data.values()))
+logic.get_standings_df(cat_data); mark("get_standings_df (first)")
+logic.get_bracket_source(cat_data); mark("get_bracket_source (first)")
+print(json.dumps(timings))
+"""
+
+
+def _summary(samples):
+    return {"best_s": min(samples), "median_s": statistics.median(samples), "repeat": len(samples)}
+
+
+def time_steps(data_file, repeat):
+    samples = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", _CHILD, ROOT, data_file], check=True, capture_output=True, text=True).stdout
+        total = time.perf_counter() - start
+        for step, seconds in json.loads(out.strip().splitlines()[-1]).items(): samples.setdefault(step, []).append(seconds)
+        samples.setdefault("process total", []).append(total)
+    return {step: _summary(values) for step, values in samples.items()}
+
+
+def time_server(port, repeat, timeout=120):
+    """Seconds from `streamlit run` until /_stcore/health answers."""
+    samples = []
+    for _ in range(repeat):
+        command = [sys.executable, "-m", "streamlit", "run", os.path.join(ROOT, "1_👑_Admin.py"),
+                   "--server.headless", "true", "--server.port", str(port)]
+        start = time.perf_counter()
+        server = subprocess.Popen(command, cwd=tempfile.gettempdir(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while time.perf_counter() - start < timeout and server.poll() is None:
+                try:
+                    with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1) as response:
+                        if response.status == 200: samples.append(time.perf_counter() - start); break
+                except OSError: time.sleep(0.05)
+        finally:
+            server.terminate(); server.wait()
+    return _summary(samples) if samples else {"skipped": "el servidor no respondió"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide el arranque en frío de la aplicación.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--groups", type=int, default=8, help="grupos del torneo sintético que se carga")
+    parser.add_argument("--server", action="store_true", help="mide también `streamlit run` hasta que responde")
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--output", default="startup_results.json")
+    args = parser.parse_args(argv)
+
+    import tournament_logic as logic
+    from bench_tournament_logic import generate_tournament
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = os.path.join(tmp, "team_tournament_data.json")
+        with open(data_file, 'w') as f: json.dump(generate_tournament(groups=args.groups), f)
+        results = time_steps(data_file, args.repeat)
+    if args.server: results["streamlit health"] = time_server(args.port, args.repeat)
+
+    report = {"meta": {"python": platform.python_version(), "platform": platform.platform(), "storage_mode": logic.STORAGE_MODE,
+                       "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}, "results": results}
+    for step, r in results.items():
+        print(f"{step:<28} " + (f"{r['median_s'] * 1000:.1f}ms (mejor {r['best_s'] * 1000:.1f}ms)" if "median_s" in r else r["skipped"]))
+    with open(args.output, 'w') as f: json.dump(report, f, indent=4)
+    print(f"Resultados guardados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
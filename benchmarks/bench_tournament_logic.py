@@ -0,0 +1,159 @@
+# benchmarks/bench_tournament_logic.py
+
+"""
+Synthetic tournament generator and timing suite for tournament_logic.
+
+    python benchmarks/bench_tournament_logic.py --sizes 8,32,128 --output bench.json
+
+Each size is the number of teams per category. Results are written as JSON so runs from
+different releases can be compared.
+"""
+
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import tournament_logic as logic  # noqa: E402
+
+
+FIRST_NAMES = ["ana", "bea", "carla", "dani", "eva", "flor", "gabi", "hugo", "ines", "juan", "lucas", "mati", "nico", "oli", "pablo", "rocio", "santi", "tomi", "vale", "zoe"]
+
+
+def _score(rng):
+    """Returns a best-of-three score line from the winner's point of view."""
+    sets = []
+    for _ in range(2):
+        sets.append(f"6-{rng.randint(0, 4)}" if rng.random() < 0.8 else "7-5")
+    if rng.random() < 0.3:
+        sets[1] = f"{rng.randint(0, 4)}-6"; sets.append(f"6-{rng.randint(0, 4)}")
+    return " ".join(sets)
+
+
+def _tie_lines(rng, team_a, team_b, players):
+    """Two singles and one doubles rubber between two teams, winners chosen at random."""
+    pa, pb = players[team_a], players[team_b]
+    rubbers = [(pa[0], pb[0]), (pa[1], pb[1]), (f"{pa[2]}/{pa[3]}", f"{pb[2]}/{pb[3]}")]
+    return [f"{x} def. {y} {_score(rng)}" if rng.random() < 0.5 else f"{y} def. {x} {_score(rng)}" for x, y in rubbers]
+
+
+def generate_tournament(seed=0, categories=1, groups=4, teams_per_group=4, players_per_team=4, knockout=True, bracket_size=None):
+    """
+    Builds a complete tournament through the public tournament_logic API: every group plays a
+    full round-robin of three-rubber ties and, when `knockout` is set, the bracket is played
+    to a champion. Returns the data dict.
+    """
+    rng = random.Random(seed)
+    random.seed(seed)  # generate_knockout_bracket shuffles with the global generator
+    data = {}
+    for c in range(categories):
+        cat_name = f"CAT{c + 1}"
+        cat_data = logic.initialize_category(data, cat_name)
+        players, members = {}, {}
+        for g in range(groups):
+            group = chr(ord('A') + g % 26) + (str(g // 26) if g >= 26 else "")
+            for t in range(teams_per_group):
+                team = f"{cat_name}-{group}{t + 1}"
+                players[team] = [f"{rng.choice(FIRST_NAMES)} {team.lower()}-{p}" for p in range(players_per_team)]
+                logic.register_team(cat_data, team, group, ", ".join(players[team]))
+                members.setdefault(group, []).append(team)
+        for group_teams in members.values():
+            for i, team_a in enumerate(group_teams):
+                for team_b in group_teams[i + 1:]:
+                    for line in _tie_lines(rng, team_a, team_b, players): logic.record_group_match(cat_data, line)
+        if knockout:
+            size = bracket_size or _bracket_size_for(groups * 2)
+            logic.generate_knockout_bracket(cat_data, 2, size)
+            while not cat_data.get('champion'):
+                rounds_before = len(cat_data['knockout'])
+                for team_a, team_b in cat_data['knockout'][-1]:
+                    if "BYE" in (team_a, team_b): continue
+                    while len(logic.get_matches_between(cat_data, team_a, team_b, knockout=True)) < 3 and not cat_data.get('champion'):
+                        line = _tie_lines(rng, team_a, team_b, players)[len(logic.get_matches_between(cat_data, team_a, team_b, knockout=True))]
+                        logic.record_knockout_match(cat_data, line)
+                if len(cat_data['knockout']) == rounds_before and not cat_data.get('champion'): break  # a round made only of byes
+    return data
+
+
+def _bracket_size_for(n):
+    size = 2
+    while size < n: size *= 2
+    return size
+
+
+def _time(fn, repeat, setup=None):
+    """Times fn() or, with `setup`, fn(setup()) with only the call inside the timer."""
+    samples = []
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        start = time.perf_counter(); fn(*args); samples.append(time.perf_counter() - start)
+    return {"best_s": min(samples), "median_s": statistics.median(samples), "repeat": repeat}
+
+
+def run_size(teams_per_category, categories, seed, repeat, teams_per_group=4):
+    groups = max(1, teams_per_category // teams_per_group)
+    start = time.perf_counter()
+    data = generate_tournament(seed=seed, categories=categories, groups=groups, teams_per_group=teams_per_group)
+    generation_s = time.perf_counter() - start
+    cat_data = data["CAT1"]
+    matches = cat_data['individual_matches']
+    results = {"generate_tournament": {"best_s": generation_s, "median_s": generation_s, "repeat": 1}}
+    line = f"{matches[-1]['p1']} def. {matches[-1]['p2']} 6-4 3-6 7-5"
+
+    results["parse_match_result"] = _time(lambda: [logic.parse_match_result(line) for _ in range(1000)], repeat)
+    results["identify_team"] = _time(lambda: [logic.identify_team(m['p1'], cat_data['teams']) for m in matches[:1000]], repeat)
+    fresh_copy = lambda: copy.deepcopy(cat_data)
+    results["record_group_match"] = _time(lambda cat: logic.record_group_match(cat, line), repeat, fresh_copy)
+    results["get_standings_df (cold)"] = _time(logic.get_standings_df, repeat, fresh_copy)
+    results["get_standings_df (warm)"] = _time(lambda: logic.get_standings_df(cat_data), repeat)
+    results["generate_knockout_bracket"] = _time(lambda cat: logic.generate_knockout_bracket(cat, 2, _bracket_size_for(groups * 2)), repeat, fresh_copy)
+    results["generate_bracket_image (cold)"] = _time(lambda: logic._build_bracket_graph(cat_data), repeat)
+    results["generate_bracket_image (warm)"] = _time(lambda: logic.generate_bracket_image(cat_data), repeat)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        previous = logic.DATA_FILE
+        logic.DATA_FILE = os.path.join(tmp, "team_tournament_data.json")
+        try:
+            results["save_data"] = _time(lambda: logic.save_data(data), repeat)
+            results["load_data"] = _time(logic.load_data, repeat)
+        finally:
+            logic.DATA_FILE = previous
+    try:
+        results["export_category_to_excel"] = _time(lambda: logic.export_category_to_excel(cat_data), repeat)
+    except Exception as e:  # graphviz's `dot` or xlsxwriter may be missing on the benchmark machine
+        results["export_category_to_excel"] = {"skipped": f"{type(e).__name__}: {e}"}
+
+    return {"teams_per_category": teams_per_category, "categories": categories, "groups": groups,
+            "teams": categories * groups * teams_per_group, "group_matches": len(matches), "results": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide tournament_logic con torneos sintéticos.")
+    parser.add_argument("--sizes", default="8,32,128", help="equipos por categoría, separados por comas")
+    parser.add_argument("--categories", type=int, default=2)
+    parser.add_argument("--teams-per-group", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    report = {"meta": {"python": platform.python_version(), "platform": platform.platform(), "seed": args.seed,
+                       "storage_mode": logic.STORAGE_MODE, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")},
+              "runs": []}
+    for size in (int(s) for s in args.sizes.split(",")):
+        run = run_size(size, args.categories, args.seed, args.repeat, args.teams_per_group)
+        report["runs"].append(run)
+        print(f"{size:>6} equipos/categoría: " + ", ".join(f"{op} {r['median_s'] * 1000:.1f}ms" for op, r in run["results"].items() if "median_s" in r))
+    with open(args.output, 'w') as f: json.dump(report, f, indent=4)
+    print(f"Resultados guardados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,81 @@
+import multiprocessing
 import os
 import sys
 import subprocess
 import webbrowser # <--- ADD THIS IMPORT
 import time       # <--- ADD THIS IMPORT
+import urllib.request
 import xlsxwriter
 
-# This part is crucial for making the executable work correctly.
-if getattr(sys, 'frozen', False):
-    base_path = sys._MEIPASS
-else:
-    base_path = os.path.dirname(os.path.abspath(__file__))
+SERVER_PORT = 8501
+HEALTH_URL = f"http://localhost:{SERVER_PORT}/_stcore/health"
+READY_TIMEOUT_SECONDS = 120  # slow venue laptops and the frozen build can take a while on first start
 
-# Construct the full path to the admin script
-admin_script_path = os.path.join(base_path, "1_👑_Admin.py")
 
-# The command to run the Streamlit app
-command = [
-    "streamlit", "run", admin_script_path,
-    "--server.headless", "true",
-    "--server.port", "8501"
-]
+def wait_until_ready(process, timeout=READY_TIMEOUT_SECONDS):
+    """Polls Streamlit's health endpoint; True once it answers, False if the server exits or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None: return False
+        try:
+            with urllib.request.urlopen(HEALTH_URL, timeout=1) as response:
+                if response.status == 200: return True
+        except OSError: pass  # not listening yet
+        time.sleep(0.1)
+    return False
 
-# Run the command in a non-blocking way
-subprocess.Popen(command)
 
-# --- THIS IS THE NEW PART ---
-# Give the server a moment to start up
-time.sleep(3)
+def main():
+    # This part is crucial for making the executable work correctly.
+    if getattr(sys, 'frozen', False):
+        base_path = sys._MEIPASS
+    else:
+        base_path = os.path.dirname(os.path.abspath(__file__))
 
-# Now, tell the OS to open the default web browser to the correct URL
-webbrowser.open("http://localhost:8501")
\ No newline at end of file
+    # Construct the full path to the admin script
+    admin_script_path = os.path.join(base_path, "1_👑_Admin.py")
+
+    # The command to run the Streamlit app
+    command = [
+        "streamlit", "run", admin_script_path,
+        "--server.headless", "true",
+        "--server.port", str(SERVER_PORT)
+    ]
+
+    # Run the command in a non-blocking way
+    start = time.monotonic()
+    server = subprocess.Popen(command)
+
+    # Open the browser as soon as the server answers its health check
+    if wait_until_ready(server):
+        print(f"Servidor listo en {time.monotonic() - start:.2f} s")
+    elif server.poll() is not None:
+        sys.exit(f"El servidor terminó al iniciar (código {server.returncode}).")
+    else:
+        print(f"El servidor no respondió en {READY_TIMEOUT_SECONDS} s; abriendo el navegador de todos modos.")
+
+    # Now, tell the OS to open the default web browser to the correct URL
+    webbrowser.open(f"http://localhost:{SERVER_PORT}")
+
+    # Serve the read-only JSON/SVG feed for venue screens next to Streamlit (TENIS_FEED_PORT=0 disables it)
+    feed_port = int(os.environ.get("TENIS_FEED_PORT", "8502"))
+    stop_feed = None
+    if feed_port:
+        import tournament_feed
+        try: stop_feed = tournament_feed.start(feed_port)
+        except OSError as e: print(f"No se pudo iniciar el feed en el puerto {feed_port}: {e}")
+
+    # Stay alive as long as Streamlit does, and take the feed down with it
+    try:
+        server.wait()
+    except KeyboardInterrupt:
+        server.terminate(); server.wait()
+    finally:
+        if stop_feed: stop_feed()
+
+
+# Any process pool (ours or a library's) starts workers by re-running the entry point under
+# spawn and in the frozen build; only the real launch may start the server.
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
\ No newline at end of file
@@ -43,8 +43,9 @@ st.markdown("""
 
 
 # --- Data Loading and State Initialization ---
-data = logic.load_data()
-categories = list(data.keys())
+# Only the prebuilt display snapshots written by save_data are read here.
+# Each slide is a category's main view or, once its players have results, its leaderboard.
+slides = logic.get_display_slides()
 
 # Initialize session state keys only if they are missing
 if 'public_view_cat_index' not in st.session_state:
@@ -54,20 +55,34 @@ if 'last_rotation_time' not in st.session_state:
 
 
 # --- Core Rotation Logic ---
-elapsed_time = time.time() - st.session_state.last_rotation_time
-
-if elapsed_time > ROTATION_INTERVAL_SECONDS and len(categories) > 1:
-    st.session_state.public_view_cat_index = (st.session_state.public_view_cat_index + 1) % len(categories)
-    st.session_state.last_rotation_time = time.time()
-    elapsed_time = 0
+# The slide shown in this run; the watcher below advances it and reruns the page.
+current_category_name, current_slide = slides[st.session_state.public_view_cat_index % len(slides)] if slides else (None, None)
+st.session_state.shown_display_version = logic.get_display_version(current_category_name)
+
+
+@st.fragment(run_every=1)
+def rotation_watcher():
+    """Reruns only itself every second to update the countdown; the full page reruns only when
+    the rotation fires or the displayed data changes."""
+    slides_now = logic.get_display_slides()
+    elapsed_time = time.time() - st.session_state.last_rotation_time
+    if elapsed_time > ROTATION_INTERVAL_SECONDS and len(slides_now) > 1:
+        st.session_state.public_view_cat_index = (st.session_state.public_view_cat_index + 1) % len(slides_now)
+        st.session_state.last_rotation_time = time.time()
+        st.rerun(scope="app")
+    if logic.get_display_version(current_category_name) != st.session_state.shown_display_version:
+        st.rerun(scope="app")
+    if len(slides_now) > 1:  # have the next category ready before the switch; re-queued when its data changes
+        logic.prefetch_display_view(slides_now[(st.session_state.public_view_cat_index + 1) % len(slides_now)][0])
+    time_left = int(ROTATION_INTERVAL_SECONDS - elapsed_time)
+    st.write(f"#### Cambiando categoría en: **{max(0, time_left)}s**")
 
 
 # --- Native Streamlit Header (RELIABLE) ---
 col1, col2 = st.columns([4, 1])
 
 with col1:
-    time_left = int(ROTATION_INTERVAL_SECONDS - elapsed_time)
-    st.write(f"#### Cambiando categoría en: **{max(0, time_left)}s**")
+    rotation_watcher()
 
 with col2:
     if st.button("👑 Volver al Panel de Admin"):
@@ -77,24 +92,37 @@ st.markdown("---") # Visual separator
 
 
 # --- Main Page Display ---
-if not categories:
+if not slides:
     st.title("Esperando datos del torneo...");
     st.stop()
 
-# Get the current category name and data for display
-current_category_name = categories[st.session_state.public_view_cat_index]
-cat_data = data.get(current_category_name, {})
+# Courts are shared by all categories, so the queue is shown on every rotation
+next_on_court = logic.load_display_index().get('next_on_court', [])
+if next_on_court:
+    st.subheader("🎾 Próximos en Cancha")
+    st.dataframe(pd.DataFrame([[m['court'], m['time'], m['category'], f"{m['teams'][0]} vs {m['teams'][1]}", m['rubber']] for m in next_on_court],
+                              columns=["Cancha", "Horario", "Categoría", "Enfrentamiento", "Partido"]).set_index('Cancha'), use_container_width=True)
+
+# Get the current category's display snapshot and its standings tables (usually prepared in the background)
+view = logic.get_display_view(current_category_name) or {"snapshot": {}, "standings": {}, "bracket_svg": None}
+snapshot = view['snapshot']
+
+# --- Leaderboard Slide ---
+if current_slide == "leaders":
+    st.header(f"🎖️ Mejores Jugadores - CAT: {current_category_name}")
+    st.dataframe(pd.DataFrame(snapshot.get('leaderboard', []), columns=logic.PLAYER_COLUMNS).set_index('Jugador'), use_container_width=True)
+    st.stop()
 
 # --- Page Layout ---
 col1, col2 = st.columns([3,3])
 
 with col1:
     st.header(f"📊 Posiciones de Grupo - CAT: {current_category_name}")
-    standings_df = logic.get_standings_df(cat_data)
-    if not standings_df.empty:
-        for group_name, group_df in standings_df.groupby('Grupo'):
+    group_standings = view['standings']
+    if group_standings:
+        for group_name, group_df in group_standings.items():
             st.subheader(f"Grupo {group_name}")
-            st.dataframe(group_df.drop(columns=['Grupo']).set_index('Equipo'), use_container_width=True)
+            st.dataframe(group_df, use_container_width=True)
     else:
         st.info("No hay equipos en esta categoría.")
 
@@ -102,19 +130,20 @@ with col1:
 
 with col2:
     # Check if the knockout phase has been generated at all
-    knockout_data_exists = cat_data.get('knockout')
+    knockout_data_exists = snapshot.get('knockout')
 
     st.header("🏆 Fase Eliminatoria" if knockout_data_exists else "🎾 Partidos Recientes")
 
     if knockout_data_exists:
         # If knockout data exists, always show the bracket.
         # The logic file will correctly draw it whether it's in progress or finished.
-        bracket_image = logic.generate_bracket_image(cat_data)
-        if bracket_image:
-            st.graphviz_chart(bracket_image)
+        if view.get('bracket_svg'):
+            st.image(view['bracket_svg'], use_container_width=True)
+        elif snapshot.get('bracket_dot'):
+            st.graphviz_chart(snapshot['bracket_dot'])
 
         st.subheader("Resultados de Eliminatoria")
-        ko_matches = cat_data.get('knockout_individual_matches', [])
+        ko_matches = snapshot.get('recent_knockout_matches', [])
         if not ko_matches:
             st.info("Aún no se han registrado partidos de eliminatoria.")
         else:
@@ -126,7 +155,7 @@ with col2:
                 )
     else:
         # If no knockout data exists, show recent GROUP matches.
-        group_matches = cat_data.get('individual_matches', [])
+        group_matches = snapshot.get('recent_group_matches', [])
         if not group_matches:
             st.info("Aún no se han registrado partidos de grupo.")
         else:
@@ -136,8 +165,3 @@ with col2:
                     f"_({match['team1']} vs {match['team2']})_",
                     unsafe_allow_html=True
                 )
-
-
-# --- Stable Auto-Refresh ---
-time.sleep(1)
-st.rerun()
\ No newline at end of file
@@ -0,0 +1,155 @@
+# tournament_feed.py
+
+"""
+Read-only HTTP feed of the tournament for venue screens and the scoreboard website.
+
+    GET /api/categories                          -> ["4TA", ...]
+    GET /api/categories/<cat>/standings          -> {"version": ..., "groups": {"A": [row, ...]}}
+    GET /api/categories/<cat>/matches?limit=10   -> {"group": [...], "knockout": [...], "champion": ...}
+    GET /api/categories/<cat>/bracket.svg        -> image/svg+xml
+
+Responses carry an ETag derived from the stored data's version, so a poller that sends
+If-None-Match gets a bodyless 304 until something is saved. Bodies are built once per
+data version and gzip-compressed for clients that accept it.
+
+The feed listens on localhost only; set TENIS_FEED_HOST (e.g. 0.0.0.0) to expose it to the
+venue network and TENIS_FEED_CORS to the scoreboard site's origin to let browsers read it.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from urllib.parse import unquote
+
+import tornado.httpserver
+import tornado.ioloop
+import tornado.netutil
+import tornado.web
+
+import tournament_logic as logic
+
+
+FEED_PORT = 8502
+FEED_HOST = os.environ.get("TENIS_FEED_HOST", "127.0.0.1")
+FEED_CORS_ORIGIN = os.environ.get("TENIS_FEED_CORS", "")
+_body_cache = {}
+_body_cache_lock = threading.Lock()
+
+
+class _FeedHandler(tornado.web.RequestHandler):
+    content_type = "application/json; charset=utf-8"
+
+    def set_default_headers(self):
+        if FEED_CORS_ORIGIN: self.set_header("Access-Control-Allow-Origin", FEED_CORS_ORIGIN)
+        self.set_header("Cache-Control", "no-cache")
+
+    def compute_etag(self):
+        return None  # the ETag is set from the data version before any body is built
+
+    def get(self, *args):
+        args = tuple(unquote(a) for a in args)
+        token = logic._data_token()
+        etag = '"' + hashlib.sha1(repr((token, type(self).__name__, args, self.request.query)).encode('utf-8')).hexdigest() + '"'
+        self.set_header("Etag", etag)
+        if _etag_matches(etag, self.request.headers.get("If-None-Match", "")):
+            self.set_status(304); return
+        with _body_cache_lock: body = _body_cache.get(etag)
+        if body is None:
+            body = self.build(*args)
+            if body is None: return
+            with _body_cache_lock:
+                if len(_body_cache) > 512: _body_cache.clear()
+                _body_cache[etag] = body
+        self.set_header("Content-Type", self.content_type)
+        self.write(body)
+
+    def category(self, cat_name):
+        """Loads only the requested category (a single shard in sharded mode); 404 when it does not exist."""
+        cat_data = logic.load_category(cat_name)
+        if cat_data is None: self.send_error(404)
+        return cat_data
+
+
+def _etag_matches(etag, header):
+    """If-None-Match is a comma-separated list of (possibly weak) tags, or `*`."""
+    tags = {tag.strip() for tag in header.split(",")}
+    return "*" in tags or etag in tags or "W/" + etag in tags
+
+
+def _json(obj):
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+class CategoriesHandler(_FeedHandler):
+    def build(self):
+        return _json(logic.get_category_names())
+
+
+class StandingsHandler(_FeedHandler):
+    def build(self, cat_name):
+        cat_data = self.category(cat_name)
+        if cat_data is None: return None
+        groups = logic.get_standings_rows(cat_data) if cat_data.get('teams') else {}
+        return _json({"category": cat_name, "version": logic.get_standings_version(cat_data), "groups": groups})
+
+
+class MatchesHandler(_FeedHandler):
+    def build(self, cat_name):
+        cat_data = self.category(cat_name)
+        if cat_data is None: return None
+        try: limit = max(0, int(self.get_query_argument("limit", "10")))
+        except ValueError: limit = 10
+        recent = lambda key: list((cat_data.get(key) or ())[-limit:])[::-1] if limit else []
+        return _json({"category": cat_name, "group": recent('individual_matches'), "knockout": recent('knockout_individual_matches'),
+                      "team_results": recent('team_results'), "champion": cat_data.get('champion')})
+
+
+class BracketHandler(_FeedHandler):
+    content_type = "image/svg+xml"
+
+    def build(self, cat_name):
+        cat_data = self.category(cat_name)
+        if cat_data is None: return None
+        if not cat_data.get('knockout'):
+            self.send_error(404); return None
+        import graphviz
+        try: return logic.render_bracket(cat_data, 'svg')
+        except (graphviz.ExecutableNotFound, graphviz.CalledProcessError):  # `dot` is missing or failed; anything else is a bug and a 500
+            self.send_error(503); return None
+
+
+def make_app():
+    return tornado.web.Application([
+        (r"/api/categories/?", CategoriesHandler),
+        (r"/api/categories/([^/]+)/standings/?", StandingsHandler),
+        (r"/api/categories/([^/]+)/matches/?", MatchesHandler),
+        (r"/api/categories/([^/]+)/bracket\.svg", BracketHandler),
+    ], compress_response=True)
+
+
+def serve(port=FEED_PORT, address=FEED_HOST):
+    """Runs the feed on the current thread until the process exits."""
+    make_app().listen(port, address=address)
+    tornado.ioloop.IOLoop.current().start()
+
+
+def start(port=FEED_PORT, address=FEED_HOST):
+    """Runs the feed on a daemon thread and returns a function that stops it; binding errors raise here."""
+    sockets = tornado.netutil.bind_sockets(port, address=address)
+    loops = []; ready = threading.Event()
+    def run():
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        server = tornado.httpserver.HTTPServer(make_app())
+        server.add_sockets(sockets)
+        loops.append(tornado.ioloop.IOLoop.current()); ready.set()
+        loops[0].start()
+        server.stop(); loops[0].close(all_fds=True)
+    threading.Thread(target=run, name="tournament-feed", daemon=True).start()
+    ready.wait()
+    return lambda: loops[0].add_callback(loops[0].stop)
+
+
+if __name__ == "__main__":
+    serve()
@@ -2,35 +2,395 @@
 
 import json
 import re
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import random
-import pandas as pd
-import graphviz
+import threading
+import os
+import hashlib
 import io
+import itertools
+import weakref
+# numpy, pandas and graphviz are imported where they are first needed, so importing this
+# module (the feed, the storage CLI, the launcher's checks) does not pay for them.
 
 
 DATA_FILE = "team_tournament_data.json"
+# "json" rewrites DATA_FILE on every save; "journal" appends each mutation to a log,
+# "sqlite" updates only the affected rows of a database next to DATA_FILE, "sharded"
+# rewrites only the changed categories' files and "packed" keeps the match history as
+# interned integer rows (see tournament_storage).
+STORAGE_MODE = os.environ.get("TENIS_STORAGE", "json")
 
 # --- Data Handling and Core Logic (No changes in this section) ---
 def load_data():
+    # Fresh dicts always miss the index cache, so indexes are rebuilt lazily on first use.
+    data = _storage_backend().load() if STORAGE_MODE != "json" else _read_data_file()
+    if not isinstance(data, _Tracked): data = _tracked(data)  # backends that track what they synced already return these
+    for cat_data in data.values():
+        # Heals counters that drifted in older files, only when their totals give them away; logged so the next save persists the fix
+        if isinstance(cat_data, dict) and cat_data.get('teams') and not _stats_look_consistent(cat_data) and rebuild_category_stats(cat_data):
+            _log_mutation(cat_data, "rebuild")
+    return data
+
+
+def load_category(cat_name):
+    """
+    Loads one category for display (None if missing); the sharded mode reads only that
+    category's file, the other modes pick it out of the shared read-only load_data_cached().
+    """
+    if STORAGE_MODE != "sharded": return load_data_cached().get(cat_name)
+    cat_data = _storage_backend().load_category(cat_name)
+    if not isinstance(cat_data, dict): return None
+    cat_data = _Tracked(cat_data)  # its heal record, if any, goes away with it
+    if cat_data.get('teams') and not _stats_look_consistent(cat_data) and rebuild_category_stats(cat_data): _log_mutation(cat_data, "rebuild")
+    return cat_data
+
+
+def get_category_names():
+    """Category names in order; the sharded mode reads only its manifest."""
+    if STORAGE_MODE != "sharded": return list(load_data_cached())
+    return _storage_backend().category_names()
+
+
+def _read_data_file():
     try:
         with open(DATA_FILE, 'r') as f: return json.load(f)
     except (FileNotFoundError, json.JSONDecodeError): return {}
     
     
 def save_data(data):
-    with open(DATA_FILE, 'w') as f: json.dump(data, f, indent=4)
+    global _data_version
+    records = _take_mutations(data)
+    if STORAGE_MODE != "json": _storage_backend().save(data, records)
+    else:
+        with open(DATA_FILE, 'w') as f: json.dump(data, f, indent=4)
+    _data_version += 1
+    write_display_snapshots(data, records)
+
+
+# --- Shared read cache ---
+# One cache per process, shared by every session that only displays data (e.g. the public screen).
+_data_version = 0  # bumped by every save_data in this process
+_data_cache = {"token": None, "data": None, "hits": 0, "misses": 0}
+_data_cache_lock = threading.Lock()
+
+
+class _FrozenDict(dict):
+    """Read-only dict used for cached snapshots; copying it yields a regular mutable dict."""
+
+    def _readonly(self, *args, **kwargs): raise TypeError("Los datos en caché son de solo lectura; usa load_data() para modificarlos.")
+    __setitem__ = __delitem__ = __ior__ = pop = popitem = setdefault = update = clear = _readonly
+
+    def __reduce__(self): return (dict, (dict(self),))
+
+
+def _freeze(obj, _interners=None):
+    _interners = {} if _interners is None else _interners  # packed match tables of one load share a frozen string table
+    if isinstance(obj, dict): return _FrozenDict((k, _freeze(v, _interners)) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)): return tuple(_freeze(v, _interners) for v in obj)
+    if hasattr(obj, 'frozen'): return obj.frozen(_interners)  # packed storage's MatchTable
+    return obj
+
+
+def _data_token():
+    if STORAGE_MODE != "json": return (_data_version, _storage_backend().version_token())
+    try: stat = os.stat(DATA_FILE); return (_data_version, stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError: return (_data_version, None)
+
+
+def load_data_cached():
+    """Returns a shared, read-only snapshot of the saved tournament, re-read only when storage changed."""
+    token = _data_token()
+    with _data_cache_lock:
+        if _data_cache['token'] == token and _data_cache['data'] is not None:
+            _data_cache['hits'] += 1
+            return _data_cache['data']
+        _data_cache['misses'] += 1
+        _data_cache['data'], _data_cache['token'] = _freeze(load_data()), token
+        return _data_cache['data']
+
+
+def get_data_cache_stats():
+    with _data_cache_lock: return {"hits": _data_cache['hits'], "misses": _data_cache['misses'], "token": _data_cache['token']}
+
+
+def _storage_backend():
+    import tournament_storage
+    return tournament_storage.get_backend(STORAGE_MODE, DATA_FILE)
+
+
+# --- Mutation log ---
+# Every mutating function records what it did, so non-JSON storage modes can persist
+# a single change without re-serializing the whole tournament. Records are kept per
+# mutated dict (the tournament or one category) until save_data takes the ones belonging
+# to the data it is saving. Loaded data is made of _Tracked dicts, which are weakly
+# referenced here, so the records of copies, deleted categories and unsaved data go away
+# with them; a plain dict is held until it is saved.
+_mutation_logs = {}  # id(target) -> (weak or strong reference to target, [(order, record)])
+_mutation_order = itertools.count()
+_dead_mutation_logs = []  # (id, dead weakref) pairs queued by weakref callbacks, purged under the lock
+_mutation_lock = threading.Lock()
+
+
+class _Tracked(dict):
+    """A plain dict that can be weakly referenced and carry its in-memory indexes; copies and pickles drop both."""
+    __slots__ = ('__weakref__', '_indexes')
+
+    def __reduce__(self): return (_Tracked, (dict(self),))
+
+
+def _tracked(data):
+    """`data` with the tournament, category and `teams` dicts as _Tracked (other nested values are shared)."""
+    def category(cat):
+        if type(cat) is not dict: return cat
+        cat = _Tracked(cat)
+        if type(cat.get('teams')) is dict: cat['teams'] = _Tracked(cat['teams'])
+        return cat
+    return _Tracked((name, category(cat)) for name, cat in data.items())
+
+
+def _log_target(ref):
+    return ref() if isinstance(ref, weakref.ref) else ref
+
+
+def _purge_mutation_logs():
+    while _dead_mutation_logs:
+        key, ref = _dead_mutation_logs.pop()
+        if key in _mutation_logs and _mutation_logs[key][0] is ref: del _mutation_logs[key]
+
+
+def _log_mutation(target, op, **fields):
+    # A JSON save rewrites the whole file; only which categories changed is used (by the display snapshots)
+    record = {"op": op, **fields} if STORAGE_MODE != "json" else {"op": op, **({"cat": fields["cat"]} if "cat" in fields else {})}
+    with _mutation_lock:
+        _purge_mutation_logs()
+        entry = _mutation_logs.get(id(target))
+        if entry is None or _log_target(entry[0]) is not target:
+            try: ref = weakref.ref(target, lambda ref, key=id(target): _dead_mutation_logs.append((key, ref)))
+            except TypeError: ref = target
+            entry = _mutation_logs[id(target)] = (ref, [])
+        entry[1].append((next(_mutation_order), record))
+
+
+def _discard_mutations(target):
+    with _mutation_lock:
+        entry = _mutation_logs.get(id(target))
+        if entry and _log_target(entry[0]) is target: del _mutation_logs[id(target)]
+
+
+def _take_mutations(data):
+    """Removes and returns the pending records for `data`, in logging order, each category's tagged with its name."""
+    taken = []
+    with _mutation_lock:
+        _purge_mutation_logs()
+        for name, target in [(None, data), *data.items()]:
+            entry = _mutation_logs.get(id(target))
+            if not entry or _log_target(entry[0]) is not target: continue
+            del _mutation_logs[id(target)]
+            taken.extend((order, record if name is None else {"cat": name, **record}) for order, record in entry[1])
+    return [record for _, record in sorted(taken, key=lambda item: item[0])]
+
+
+class InvalidMutationRecord(ValueError):
+    """A record that is malformed, names an unknown operation or a missing category, rather than one whose action no longer applies."""
+
+
+_MUTATION_FIELDS = {
+    "init_category": (), "delete_category": (), "register_team": ("name", "group", "players"), "delete_team": ("name",),
+    "group_match": ("line",), "group_matches": ("lines",), "knockout_match": ("line",), "knockout": ("rounds",),
+    "reset_knockout": (), "schedule": ("fixtures",), "ranking": ("criteria",), "rebuild": (),
+}
+
+
+def apply_mutation(data, record):
+    """
+    Re-applies a record produced by the mutation log to `data`. Raises InvalidMutationRecord
+    for a record that cannot be replayed at all, and the action's own ValueError when it no
+    longer applies (as the original action would have failed on this data).
+    """
+    op = record.get('op') if isinstance(record, dict) else None
+    if op not in _MUTATION_FIELDS: raise InvalidMutationRecord(f"Operación desconocida: {op}" if op is not None else f"Registro inválido: {record!r}")
+    missing = [field for field in ("cat",) + _MUTATION_FIELDS[op] if field not in record]
+    if missing: raise InvalidMutationRecord(f"Registro '{op}' incompleto, falta: {', '.join(missing)}")
+    cat_name = record['cat']
+    if op not in ("init_category", "delete_category") and cat_name not in data: raise InvalidMutationRecord(f"Registro '{op}' de una categoría inexistente: {cat_name}")
+    if op == "init_category": initialize_category(data, cat_name)
+    elif op == "delete_category": delete_category(data, cat_name)
+    else:
+        cat_data = data[cat_name]
+        if op == "register_team": register_team(cat_data, record['name'], record['group'], record['players'])
+        elif op == "delete_team": delete_team(cat_data, record['name'])
+        elif op == "group_match": record_group_match(cat_data, record['line'])
+        elif op == "group_matches": import_group_results(cat_data, "\n".join(record['lines']))
+        elif op == "knockout_match": record_knockout_match(cat_data, record['line'])
+        elif op == "knockout": _set_knockout(cat_data, record['rounds'])
+        elif op == "reset_knockout": reset_knockout_phase(cat_data)
+        elif op == "schedule": cat_data['schedule'] = record['fixtures']
+        elif op == "ranking": set_ranking_criteria(cat_data, record['criteria'])
+        elif op == "rebuild": rebuild_category_stats(cat_data)
     
     
+# --- In-memory indexes ---
+# Indexes live on the dict they describe, in an attribute that is not a key, so the
+# tournament data stays plain JSON and nothing extra is ever serialized: loaded, cached and
+# new tournaments are made of _Tracked (or read-only) dicts, and their indexes are freed
+# with them however many categories there are. Only plain dicts handed in by callers fall
+# back to a side table keyed by identity, a small LRU that holds them.
+_INDEX_CACHE_SIZE = 64  # plain dicts whose indexes are kept
+_index_cache = OrderedDict()  # id(plain dict) -> (the dict, {index class: index})
+_index_lock = threading.Lock()
+
+
+def _index_for(obj, index_cls):
+    with _index_lock:
+        try: indexes = obj._indexes
+        except AttributeError:
+            try: indexes = obj._indexes = {}
+            except AttributeError:  # a plain dict
+                entry = _index_cache.get(id(obj))
+                if entry is None or entry[0] is not obj: entry = _index_cache[id(obj)] = (obj, {})
+                _index_cache.move_to_end(id(obj))
+                while len(_index_cache) > _INDEX_CACHE_SIZE: _index_cache.popitem(last=False)
+                indexes = entry[1]
+        index = indexes.get(index_cls)
+        if index is None: index = indexes[index_cls] = index_cls(obj)
+        return index
+
+
+def _normalize_name(name):
+    return " ".join(name.strip().lower().split())
+
+
+class _RosterIndex:
+    """Maps normalized player names (and resolved "a/b" pairs) of one `teams` dict to their team."""
+
+    def __init__(self, teams):
+        self.owner = teams
+        self.rebuild()
+
+    def rebuild(self):
+        self.players = defaultdict(set); self.pairs = {}
+        for team_name, info in self.owner.items(): self._add(team_name, info)
+        self.size = len(self.owner)
+
+    def _add(self, team_name, info):
+        for p in info.get('players', []): self.players[_normalize_name(p)].add(team_name)
+
+    def add_team(self, team_name, info):
+        self.remove_team(team_name); self._add(team_name, info); self.size = len(self.owner)
+
+    def remove_team(self, team_name):
+        for name in [n for n, owners in self.players.items() if team_name in owners]:
+            self.players[name].discard(team_name)
+            if not self.players[name]: del self.players[name]
+        self.pairs.clear(); self.size = len(self.owner)
+
+    def lookup(self, player):
+        if self.size != len(self.owner): self.rebuild()
+        names = tuple(_normalize_name(n) for n in player.split("/"))
+        if names not in self.pairs:
+            candidates = set.intersection(*(self.players.get(n, set()) for n in names))
+            self.pairs[names] = sorted(candidates)
+        return self.pairs[names]
+
+    def ambiguous(self):
+        if self.size != len(self.owner): self.rebuild()
+        return {name: sorted(owners) for name, owners in self.players.items() if len(owners) > 1}
+
+
+class _PairTable:
+    """Matches of one list grouped by unordered team pair, with a running tally per pair."""
+
+    def __init__(self):
+        self.ref, self.size, self.pairs = None, -1, {}
+
+    def is_current(self, matches):
+        return matches is self.ref and len(matches or ()) == self.size
+
+    def rebuild(self, matches):
+        self.ref, self.size, self.pairs = matches, 0, {}
+        for m in matches or (): self.add(m)
+
+    def entry(self, team_a, team_b):
+        return self.pairs.get(frozenset((team_a, team_b)))
+
+    def add(self, match):
+        entry = self.pairs.setdefault(frozenset((match['team1'], match['team2'])), {"matches": [], "tally": defaultdict(int), "result": None})
+        entry['matches'].append(match); entry['tally'][match['winner']] += 1
+        self.size += 1
+        return entry
+
+
+class _MatchupIndex:
+    """Pair-keyed view of a category's group and knockout matches and group team results."""
+
+    def __init__(self, cat_data):
+        self.owner = cat_data
+        self.group, self.knockout = _PairTable(), _PairTable()
+        self.results_ref, self.results_size = None, -1
+
+    def group_table(self):
+        matches, results = self.owner.get('individual_matches'), self.owner.get('team_results')
+        if not self.group.is_current(matches) or results is not self.results_ref or len(results or ()) != self.results_size:
+            self.group.rebuild(matches)
+            for res in results or (): self._attach_result(res)
+            self.results_ref, self.results_size = results, len(results or ())
+        return self.group
+
+    def knockout_table(self):
+        matches = self.owner.get('knockout_individual_matches')
+        if not self.knockout.is_current(matches): self.knockout.rebuild(matches)
+        return self.knockout
+
+    def _attach_result(self, res):
+        entry = self.group.pairs.setdefault(frozenset(res['teams']), {"matches": [], "tally": defaultdict(int), "result": None})
+        if entry['result'] is None: entry['result'] = res
+
+    def drop_team(self, team_name):
+        """Re-points the group table at the filtered lists written by delete_team, dropping the team's pairs."""
+        for table in (self.group, self.knockout):
+            table.pairs = {pair: e for pair, e in table.pairs.items() if team_name not in pair}
+        self.group.ref, self.group.size = self.owner['individual_matches'], len(self.owner['individual_matches'])
+        self.results_ref, self.results_size = self.owner['team_results'], len(self.owner['team_results'])
+
+    def add_result(self, res):
+        self.group_table(); self.owner['team_results'].append(res)
+        self._attach_result(res); self.results_size += 1
+
+
+def _append_match(cat_data, key, match):
+    """Appends a match to cat_data[key] and returns its (kept current) pair entry."""
+    index = _index_for(cat_data, _MatchupIndex)
+    table = index.knockout_table() if key == 'knockout_individual_matches' else index.group_table()
+    cat_data.setdefault(key, []).append(match)
+    if table.ref is not cat_data[key]: table.ref, table.size = cat_data[key], len(cat_data[key]) - 1
+    _index_for(cat_data, _PlayerIndex).add(key, match)
+    return table.add(match)
+
+
+def get_matches_between(cat_data, team_a, team_b, knockout=False):
+    """Returns the individual matches played between two teams, in recording order."""
+    index = _index_for(cat_data, _MatchupIndex)
+    entry = (index.knockout_table() if knockout else index.group_table()).entry(team_a, team_b)
+    return list(entry['matches']) if entry else []
+
+
+def get_ambiguous_players(cat_data):
+    """Returns {player: [teams]} for every player registered in more than one team."""
+    return _index_for(cat_data.get('teams', {}), _RosterIndex).ambiguous()
+
+
 def initialize_category(data, cat_name):
     if cat_name not in data:
-        data[cat_name] = {"teams": {}, "team_results": [], "individual_matches": [], "knockout": [], "knockout_individual_matches": []}
+        data[cat_name] = _Tracked({"teams": _Tracked(), "team_results": [], "individual_matches": [], "knockout": [], "knockout_individual_matches": []})
+        _log_mutation(data, "init_category", cat=cat_name)
     return data[cat_name]
 
 
 def delete_category(data, cat_name):
     if cat_name in data:
-        data.pop(cat_name)
+        _discard_mutations(data.pop(cat_name))
+        _log_mutation(data, "delete_category", cat=cat_name)
         return f"Categoría '{cat_name}' eliminada permanentemente."
     return "Categoría no encontrada."
 
@@ -39,9 +399,14 @@ def delete_team(cat_data, team_name_to_delete):
     if cat_data.get('knockout'):
         raise ValueError("No se pueden eliminar equipos una vez que ha comenzado la fase eliminatoria.")
     if team_name_to_delete in cat_data.get('teams', {}):
-        cat_data['teams'].pop(team_name_to_delete)
+        deleted = cat_data['teams'].pop(team_name_to_delete)
+        _index_for(cat_data, _StandingsIndex).remove_team(team_name_to_delete, deleted['group'])
+        _index_for(cat_data['teams'], _RosterIndex).remove_team(team_name_to_delete)
+        matchups = _index_for(cat_data, _MatchupIndex); matchups.group_table(); matchups.knockout_table()
         cat_data['individual_matches'] = [m for m in cat_data.get('individual_matches', []) if team_name_to_delete not in (m['team1'], m['team2'])]
-        cat_data['team_results'] = [r for r in cat_data.get('team_results', []) if team_name_to_delete not in r['teams']]
+        rebuild_category_stats(cat_data)  # rolls back the remaining teams' stats against the deleted team
+        matchups.drop_team(team_name_to_delete)
+        _log_mutation(cat_data, "delete_team", name=team_name_to_delete)
         return f"Equipo '{team_name_to_delete}' y todos sus partidos han sido eliminados."
     return f"Equipo '{team_name_to_delete}' no encontrado."
 
@@ -49,9 +414,15 @@ def delete_team(cat_data, team_name_to_delete):
 def register_team(cat_data, name, group, players_str):
     players = [p.strip().lower() for p in players_str.split(',')]
     cat_data['teams'][name] = {"group": group.upper(), "players": players, "team_matches_played": 0, "team_matches_won": 0, "individual_matches_won": 0, "sets_won": 0, "sets_lost": 0, "games_won": 0, "games_lost": 0}
+    _index_for(cat_data['teams'], _RosterIndex).add_team(name, cat_data['teams'][name])
+    _index_for(cat_data, _StandingsIndex).add_team(name)
+    _log_mutation(cat_data, "register_team", name=name, group=group, players=players_str)
     return f"Equipo '{name}' registrado en el grupo {group}."
 
 
+_RESULT_RE = re.compile(r"(.+?)\s+def\.\s+(.+?)\s+((\d+-\d+\s*)+)")
+
+
 def parse_match_result(result_line):
     """
     Parses a match result string, correctly handling multi-word names.
@@ -63,7 +434,7 @@ def parse_match_result(result_line):
     # (.+?)   - Group 2: One or more characters (non-greedy) for Player 2
     # \s+     - A space before the score
     # ((\d+-\d+\s*)+) - Group 3: The entire score string (e.g., "6-4 6-4")
-    match = re.match(r"(.+?)\s+def\.\s+(.+?)\s+((\d+-\d+\s*)+)", result_line.strip())
+    match = _RESULT_RE.match(result_line.strip())
     
     if not match:
         raise ValueError("Formato de resultado inválido. Use: 'Jugador A def. Jugador B 6-4 6-2'")
@@ -86,134 +457,895 @@ def parse_match_result(result_line):
     return p1.strip(), p2.strip(), p1_sets, p2_sets, p1_games, p2_games, " ".join(set_scores)
 
 def identify_team(player, teams):
-    names = [n.strip().lower() for n in player.split("/")]
-    for team_name, info in teams.items():
-        if all(n in info['players'] for n in names): return team_name
-    return None
+    candidates = _index_for(teams, _RosterIndex).lookup(player)
+    if len(candidates) > 1:
+        raise ValueError(f"Jugador ambiguo '{player}': pertenece a los equipos {', '.join(candidates)}.")
+    return candidates[0] if candidates else None
 
 
-def record_group_match(cat_data, result_line):
+# --- Recompute from matches ---
+_TEAM_COUNTERS = ['team_matches_played', 'team_matches_won', 'individual_matches_won', 'sets_won', 'sets_lost', 'games_won', 'games_lost']
+
+
+def _derive_category_stats(cat_data):
+    """
+    Derives every team's counters and the team_results list from individual_matches alone,
+    mirroring record_group_match: sets and games count every match, a team tie is decided
+    by the first three matches of a pair and listed in the order ties were completed.
+    Returns ({team: {counter: value}}, team_results).
+    """
+    teams = cat_data.get('teams') or {}
+    matches = cat_data.get('individual_matches') or []
+    if not matches: return {t: {c: 0 for c in _TEAM_COUNTERS} for t in teams}, []
+    import numpy as np
+    import pandas as pd
+
+    n = len(matches)
+    columns = matches.columns() if hasattr(matches, 'columns') else None  # packed match lists hand over their arrays
+    if columns: team1, team2, winners, sets_per_match, games = columns
+    else:
+        team1 = np.array([m['team1'] for m in matches], dtype=object); team2 = np.array([m['team2'] for m in matches], dtype=object)
+        winners = np.array([m['winner'] for m in matches], dtype=object)
+        set_scores = [m.get('set_scores') or "" for m in matches]
+        # Every "g1-g2" set becomes one row of a (sets, 2) array; match_of_set maps it back to its match.
+        sets_per_match = np.fromiter((s.count('-') for s in set_scores), dtype=np.int64, count=n)
+        games = np.array(" ".join(set_scores).replace('-', ' ').split(), dtype=np.int64).reshape(-1, 2)
+    match_of_set = np.repeat(np.arange(n), sets_per_match)
+    g1 = np.bincount(match_of_set, weights=games[:, 0], minlength=n).astype(np.int64)
+    g2 = np.bincount(match_of_set, weights=games[:, 1], minlength=n).astype(np.int64)
+    s1 = np.bincount(match_of_set, weights=games[:, 0] > games[:, 1], minlength=n).astype(np.int64)
+    s2 = sets_per_match - s1  # equal games count for p2, as in parse_match_result
+
+    codes, names = pd.factorize(np.concatenate([team1, team2, winners]))
+    c1, c2, cw = codes[:n], codes[n:2 * n], codes[2 * n:]
+    k = len(names)
+    totals = {
+        'sets_won': np.bincount(c1, s1, k) + np.bincount(c2, s2, k), 'sets_lost': np.bincount(c1, s2, k) + np.bincount(c2, s1, k),
+        'games_won': np.bincount(c1, g1, k) + np.bincount(c2, g2, k), 'games_lost': np.bincount(c1, g2, k) + np.bincount(c2, g1, k),
+        'individual_matches_won': np.bincount(cw, minlength=k)}
+
+    # Team ties: the third match of each unordered pair completes it, decided by the first three.
+    low, high = np.minimum(c1, c2), np.maximum(c1, c2)
+    pair = low * k + high
+    nth = pd.Series(pair).groupby(pair).cumcount().to_numpy()
+    first_three = nth < 3
+    low_wins = pd.Series((cw == low)[first_three].astype(np.int64)).groupby(pair[first_three]).sum()
+    done = np.flatnonzero(nth == 2)
+    done_low_wins = low_wins.reindex(pair[done]).to_numpy()
+    tie_winner = np.where(done_low_wins >= 2, low[done], high[done])
+    tie_wins = np.where(done_low_wins >= 2, done_low_wins, 3 - done_low_wins)
+    totals['team_matches_played'] = np.bincount(np.concatenate([c1[done], c2[done]]), minlength=k)
+    totals['team_matches_won'] = np.bincount(tie_winner, minlength=k)
+    team_results = [{"teams": [team1[i], team2[i]], "winner": names[w], "score": f"{t}-{3 - t}"} for i, w, t in zip(done, tie_winner, tie_wins)]
+
+    position = {name: i for i, name in enumerate(names)}
+    return {t: {c: int(totals[c][position[t]]) if t in position else 0 for c in _TEAM_COUNTERS} for t in teams}, team_results
+
+
+def _stats_look_consistent(cat_data):
+    """
+    Cheap invariants of the stored counters, checked on load without numpy or pandas: every
+    match has one winner, every tie one winner and two teams, and every set and game won by
+    one team is lost by another. Drift such as an opponent's matches deleted without rolling
+    back the counters breaks them; the full comparison is check_category_consistency.
+    """
+    teams = cat_data['teams'].values()
+    total = lambda counter: sum(info.get(counter, 0) for info in teams)
+    ties = len(cat_data.get('team_results') or ())
+    return (total('individual_matches_won') == len(cat_data.get('individual_matches') or ()) and total('team_matches_won') == ties
+            and total('team_matches_played') == 2 * ties and total('sets_won') == total('sets_lost') and total('games_won') == total('games_lost'))
+
+
+def rebuild_category_stats(cat_data):
+    """Overwrites the team counters and team_results of a category with the values derived from its matches; True if anything changed."""
+    derived, team_results = _derive_category_stats(cat_data)
+    changed = [t for t, counters in derived.items() if any(cat_data['teams'][t].get(c) != v for c, v in counters.items())]
+    for team_name in changed: cat_data['teams'][team_name].update(derived[team_name])
+    stored_results = [{"teams": list(r['teams']), "winner": r['winner'], "score": r.get('score')} for r in cat_data.get('team_results') or []]
+    if stored_results != team_results or 'team_results' not in cat_data: cat_data['team_results'] = team_results; changed = list(cat_data['teams'])
+    if changed: _index_for(cat_data, _StandingsIndex).touch(*changed)
+    return bool(changed)
+
+
+def check_category_consistency(cat_data):
+    """
+    Compares the stored counters and team_results with the ones derived from the matches.
+    Returns {"teams": [(team, counter, stored, derived)], "team_results_match": bool}.
+    """
+    derived, team_results = _derive_category_stats(cat_data)
+    diffs = [(t, c, info.get(c), derived[t][c]) for t, info in (cat_data.get('teams') or {}).items() for c in _TEAM_COUNTERS if info.get(c) != derived[t][c]]
+    stored_results = [{"teams": list(r['teams']), "winner": r['winner'], "score": r.get('score')} for r in cat_data.get('team_results') or []]
+    return {"teams": diffs, "team_results_match": stored_results == team_results}
+
+
+def recompute_category(cat_data):
+    """On-demand rebuild from the admin panel; logged so every storage mode persists the corrected counters."""
+    report = check_category_consistency(cat_data)
+    rebuild_category_stats(cat_data)
+    _log_mutation(cat_data, "rebuild")
+    return f"Estadísticas recalculadas: {len(report['teams'])} contadores corregidos."
+
+
+def _resolve_group_match(cat_data, result_line):
     p1, p2, s1, s2, g1, g2, set_scores = parse_match_result(result_line)
     t1 = identify_team(p1, cat_data['teams']); t2 = identify_team(p2, cat_data['teams'])
     if not t1 or not t2: raise ValueError(f"No se pudo identificar equipos para: {p1}, {p2}")
     if t1 == t2: raise ValueError("Jugadores pertenecen al mismo equipo.")
+    return p1, p2, s1, s2, g1, g2, set_scores, t1, t2
+
+
+def record_group_match(cat_data, result_line):
+    message = _apply_group_match(cat_data, *_resolve_group_match(cat_data, result_line))
+    _log_mutation(cat_data, "group_match", line=result_line)
+    return message
+
+
+def import_group_results(cat_data, text="", rows=()):
+    """
+    Records many group results at once, one "A def. B 6-4 6-2" result per line of `text`
+    (numbered from 1) and per (row number, line) pair of `rows`, e.g. an uploaded file.
+    Every line is parsed and resolved before anything is applied; invalid lines are reported
+    and skipped, and the valid ones are applied together and logged as a single mutation,
+    so one save_data persists the whole batch.
+    Returns {"applied": n, "completed": [team-tie messages], "errors": [(source, line_number, line, message)]},
+    where source is "Texto" or "Archivo".
+    """
+    valid, errors = [], []
+    numbered = [("Texto", n, line) for n, line in enumerate(text.splitlines(), start=1)] + [("Archivo", n, line) for n, line in rows]
+    for source, line_number, line in numbered:
+        if not line.strip(): continue
+        try: valid.append((line.strip(), _resolve_group_match(cat_data, line)))
+        except ValueError as e: errors.append((source, line_number, line.strip(), str(e)))
+    completed = [msg for msg in (_apply_group_match(cat_data, *parsed) for _, parsed in valid) if msg]
+    if valid: _log_mutation(cat_data, "group_matches", lines=[line for line, _ in valid])
+    return {"applied": len(valid), "completed": completed, "errors": errors}
+
+
+def _apply_group_match(cat_data, p1, p2, s1, s2, g1, g2, set_scores, t1, t2):
     winner_team = t1 if s1 > s2 else t2
-    cat_data['individual_matches'].append({"p1": p1, "p2": p2, "team1": t1, "team2": t2, "winner": winner_team, "set_scores": set_scores})
+    entry = _append_match(cat_data, 'individual_matches', {"p1": p1, "p2": p2, "team1": t1, "team2": t2, "winner": winner_team, "set_scores": set_scores})
     cat_data['teams'][winner_team]['individual_matches_won'] += 1
     for team, sets_won, sets_lost, games_won, games_lost in [(t1, s1, s2, g1, g2), (t2, s2, s1, g2, g1)]:
         cat_data['teams'][team]['sets_won'] += sets_won; cat_data['teams'][team]['sets_lost'] += sets_lost
         cat_data['teams'][team]['games_won'] += games_won; cat_data['teams'][team]['games_lost'] += games_lost
-    matches_between = [m for m in cat_data['individual_matches'] if {m['team1'], m['team2']} == {t1, t2}]
-    confrontation_recorded = any(res for res in cat_data.get('team_results', []) if frozenset(res['teams']) == frozenset([t1, t2]))
-    if len(matches_between) >= 3 and not confrontation_recorded:
-        tally = defaultdict(int); [tally.__setitem__(m['winner'], tally[m['winner']] + 1) for m in matches_between[:3]]
+    standings = _index_for(cat_data, _StandingsIndex); standings.touch(t1, t2)
+    if len(entry['matches']) >= 3 and entry['result'] is None:
+        tally = defaultdict(int); [tally.__setitem__(m['winner'], tally[m['winner']] + 1) for m in entry['matches'][:3]]
         winner = max(tally, key=tally.get)
         cat_data['teams'][t1]['team_matches_played'] += 1; cat_data['teams'][t2]['team_matches_played'] += 1
         cat_data['teams'][winner]['team_matches_won'] += 1
-        cat_data['team_results'].append({"teams": [t1, t2], "winner": winner, "score": f"{tally[winner]}-{3 - tally[winner]}"})
+        _index_for(cat_data, _MatchupIndex).add_result({"teams": [t1, t2], "winner": winner, "score": f"{tally[winner]}-{3 - tally[winner]}"})
+        standings.touch(t1, t2)
         return f"Enfrentamiento de grupo completado: {t1} vs {t2}. Ganador: {winner}"
     return None
 
 
+# --- Standings ---
+STANDINGS_COLUMNS = ['Grupo', 'Equipo', 'PJ (E)', 'PG (E)', 'PG (I)', 'SG', 'SP', 'Dif Sets', 'GG', 'GP', 'Dif Games']
+
+
+# Ranking criteria, applied in order; an "h2h_" criterion counts only the ties and rubbers played
+# among the teams still level on every earlier criterion (a mini-league), so a later "h2h_"
+# criterion is re-applied to whichever of them remain level. Teams level on all of them keep
+# their registration order.
+RANKING_STATS = ("wins", "rubbers", "sets", "games")
+RANKING_CRITERIA = {
+    "wins": "Enfrentamientos ganados", "rubbers": "Partidos ganados", "sets": "Diferencia de sets", "games": "Diferencia de games",
+    "h2h_wins": "Enfrentamientos ganados entre empatados", "h2h_rubbers": "Partidos ganados entre empatados",
+    "h2h_sets": "Diferencia de sets entre empatados", "h2h_games": "Diferencia de games entre empatados",
+}
+DEFAULT_RANKING_CRITERIA = ["wins", "h2h_wins", "rubbers", "sets", "games"]
+
+
+def _ranking_key(info):
+    """The team's RANKING_STATS, in order."""
+    return (info['team_matches_won'], info['individual_matches_won'], info['sets_won'] - info['sets_lost'], info['games_won'] - info['games_lost'])
+
+
+def get_ranking_criteria(cat_data):
+    return cat_data.get('ranking') or DEFAULT_RANKING_CRITERIA
+
+
+def set_ranking_criteria(cat_data, criteria):
+    criteria = list(criteria)
+    unknown = [c for c in criteria if c not in RANKING_CRITERIA]
+    if unknown: raise ValueError(f"Criterios de desempate desconocidos: {', '.join(unknown)}")
+    if not criteria: raise ValueError("Elige al menos un criterio de desempate.")
+    cat_data['ranking'] = criteria
+    index = _index_for(cat_data, _StandingsIndex); index.teams_ref = None  # every group is re-sorted on the next read
+    _log_mutation(cat_data, "ranking", criteria=criteria)
+    return "Criterios de desempate actualizados."
+
+
+class _HeadToHeadIndex:
+    """
+    Group results per ordered team pair: (team, rival) -> [ties won, rubbers won, set difference,
+    game difference] against that rival, in RANKING_STATS order. The match and result lists are
+    append-only, so a read only counts the rows added since the previous one; a list that was
+    replaced or shortened is counted again from scratch.
+    """
+
+    def __init__(self, cat_data):
+        self.owner = cat_data
+        self.refs, self.sizes, self.pairs = None, None, {}
+
+    def current(self):
+        lists = (self.owner.get('individual_matches'), self.owner.get('team_results'))
+        if self.refs is None or any(a is not b for a, b in zip(lists, self.refs)) or any(len(l or ()) < n for l, n in zip(lists, self.sizes)):
+            self.refs, self.sizes, self.pairs = lists, (0, 0), {}
+        matches, results = (l or () for l in lists)
+        for match in matches[self.sizes[0]:]:
+            games = [tuple(map(int, g.split('-'))) for g in (match.get('set_scores') or "").split()]  # from team1's (p1's) side
+            sets, game_diff = sum(1 if a > b else -1 for a, b in games), sum(a - b for a, b in games)
+            for team, rival, sign in ((match['team1'], match['team2'], 1), (match['team2'], match['team1'], -1)):
+                pair = self.pairs.get((team, rival)) or self.pairs.setdefault((team, rival), [0, 0, 0, 0])
+                pair[1] += match['winner'] == team; pair[2] += sign * sets; pair[3] += sign * game_diff
+        for result in results[self.sizes[1]:]:
+            winner = result['winner']; loser = next((t for t in result['teams'] if t != winner), None)
+            (self.pairs.get((winner, loser)) or self.pairs.setdefault((winner, loser), [0, 0, 0, 0]))[0] += 1
+            self.pairs.setdefault((loser, winner), [0, 0, 0, 0])
+        self.refs, self.sizes = lists, (len(matches), len(results))
+        return self
+
+    def score(self, team, rivals, field):
+        """Sum of RANKING_STATS[field] earned by `team` against the other teams of `rivals`."""
+        return sum(self.pairs[team, r][field] for r in rivals if r != team and (team, r) in self.pairs)
+
+
+def rank_teams(cat_data, names):
+    """Returns `names` (teams of one group, in registration order) sorted by the category's ranking criteria."""
+    teams, criteria = cat_data['teams'], get_ranking_criteria(cat_data)
+    stats = {t: _ranking_key(teams[t]) for t in names}
+    keys = {t: () for t in names}
+    h2h = _index_for(cat_data, _HeadToHeadIndex).current() if any(c.startswith("h2h_") for c in criteria) else None
+    for criterion in criteria:
+        field = RANKING_STATS.index(criterion.removeprefix("h2h_"))
+        if criterion == RANKING_STATS[field]:
+            for t in names: keys[t] += (stats[t][field],)
+            continue
+        level = defaultdict(list); [level[keys[t]].append(t) for t in names]
+        for tied in level.values():
+            for t in tied: keys[t] += (h2h.score(t, tied, field) if len(tied) > 1 else 0,)
+    return sorted(names, key=keys.__getitem__, reverse=True)
+
+
+def _standings_row(team_name, info):
+    return {'Grupo': info['group'], 'Equipo': team_name, 'PJ (E)': info['team_matches_played'], 'PG (E)': info['team_matches_won'],
+            'PG (I)': info['individual_matches_won'], 'SG': info['sets_won'], 'SP': info['sets_lost'], 'Dif Sets': info['sets_won'] - info['sets_lost'],
+            'GG': info['games_won'], 'GP': info['games_lost'], 'Dif Games': info['games_won'] - info['games_lost']}
+
+
+class _StandingsIndex:
+    """
+    Per-group rankings of one category. Mutations mark the groups they touch as dirty and
+    only those groups are re-sorted on the next read; rows and DataFrames are cached per
+    group and `version` changes whenever any served view would change.
+    """
+
+    def __init__(self, cat_data):
+        self.owner = cat_data
+        self.teams_ref, self.size, self.version = None, -1, 0
+        self.members, self.groups, self.dirty = {}, {}, set()
+        self.frame, self.frame_version = None, -1
+
+    def _current(self):
+        teams = self.owner.get('teams') or {}
+        if teams is not self.teams_ref or len(teams) != self.size:
+            self.teams_ref, self.size = teams, len(teams)
+            self.members = defaultdict(list)
+            for team_name, info in teams.items(): self.members[info['group']].append(team_name)
+            self.groups = {}; self.dirty = set(self.members); self.version += 1
+        for group in self.dirty:
+            names = self.members.get(group)
+            if names: self.groups[group] = {"rows": [_standings_row(t, teams[t]) for t in rank_teams(self.owner, names)], "df": None, "version": self.version}
+            else: self.groups.pop(group, None)
+        if self.dirty: self.dirty.clear()
+        return self
+
+    def touch(self, *team_names):
+        if self.teams_ref is None: return
+        changed = {self.teams_ref[t]['group'] for t in team_names if t in self.teams_ref}
+        if changed: self.dirty |= changed; self.version += 1
+
+    def add_team(self, team_name):
+        if self.teams_ref is None: return
+        for group, names in self.members.items():
+            if team_name in names: names.remove(team_name); self.dirty.add(group)
+        self.members[self.teams_ref[team_name]['group']].append(team_name)
+        self.size = len(self.teams_ref); self.touch(team_name)
+
+    def remove_team(self, team_name, group):
+        if self.teams_ref is None: return
+        if team_name in self.members.get(group, ()): self.members[group].remove(team_name)
+        self.size = len(self.teams_ref); self.dirty.add(group); self.version += 1
+
+    def rows(self):
+        self._current()
+        return {group: self.groups[group]['rows'] for group in sorted(self.groups)}
+
+    def frames(self):
+        import pandas as pd
+        self._current()
+        for entry in self.groups.values():
+            if entry['df'] is None: entry['df'] = pd.DataFrame(entry['rows'], columns=STANDINGS_COLUMNS)
+        return {group: self.groups[group]['df'] for group in sorted(self.groups)}
+
+    def full_frame(self):
+        import pandas as pd
+        self._current()
+        if self.frame_version != self.version:
+            frames = list(self.frames().values())
+            self.frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+            self.frame_version = self.version
+        return self.frame
+
+
+def get_standings_version(cat_data):
+    """Changes whenever the standings of any group in the category change."""
+    return _index_for(cat_data, _StandingsIndex)._current().version
+
+
+def get_standings_rows(cat_data):
+    """Returns {group: [row dicts in ranking order]}, groups sorted by name. Rows are shared; do not modify them."""
+    return _index_for(cat_data, _StandingsIndex).rows()
+
+
+def get_group_standings_dfs(cat_data):
+    """Returns {group: standings DataFrame}, groups sorted by name. Frames are cached; do not modify them in place."""
+    return _index_for(cat_data, _StandingsIndex).frames()
+
+
 def get_standings_df(cat_data):
-    if not cat_data.get('teams'): return pd.DataFrame()
-    df = pd.DataFrame(cat_data['teams'].values()).assign(Equipo=cat_data['teams'].keys())
-    df['Dif Sets'] = df['sets_won'] - df['sets_lost']; df['Dif Games'] = df['games_won'] - df['games_lost']
-    df = df.rename(columns={'group': 'Grupo', 'team_matches_played': 'PJ (E)', 'team_matches_won': 'PG (E)', 'individual_matches_won': 'PG (I)', 'sets_won': 'SG', 'sets_lost': 'SP', 'games_won': 'GG', 'games_lost': 'GP'})
-    return df[['Grupo', 'Equipo', 'PJ (E)', 'PG (E)', 'PG (I)', 'SG', 'SP', 'Dif Sets', 'GG', 'GP', 'Dif Games']].sort_values(by=['Grupo', 'PG (E)', 'PG (I)', 'Dif Sets', 'Dif Games'], ascending=[True, False, False, False, False]).reset_index(drop=True)
+    if not cat_data.get('teams'):
+        import pandas as pd
+        return pd.DataFrame()
+    return _index_for(cat_data, _StandingsIndex).full_frame()
+
+
+# --- Qualification odds ---
+# Monte Carlo over the group ties still to play. Each pending rubber goes to either team with
+# odds from their rubber record so far (Laplace-smoothed), and its set and game margins are
+# drawn from the scores already recorded in the category. Every simulated table is ranked like
+# the standings, by the category's ranking criteria with head-to-head mini-leagues computed
+# from simulated pair results, ties kept in registration order.
+QUALIFICATION_SIMULATIONS = 10000
+QUALIFICATION_MAX_WORK = 500_000  # simulations x pending rubbers per group at most, so a huge group simulates fewer runs instead of stalling a save
+_QUALIFICATION_MIN_SIMULATIONS = 200
+_SIMULATION_BATCH = 2048
+_SIMULATION_CELLS = 1 << 19  # simulations x (rubbers or team pairs) per batch
+_DEFAULT_MARGINS = {(2, 6): 1, (2, 4): 1, (1, 3): 1}  # (sets, games) won by, used until the category has results
+
+
+def _rubber_margins(cat_data):
+    """Counts of (sets, games) winning margins over the category's group matches."""
+    margins = defaultdict(int)
+    for match in cat_data.get('individual_matches') or ():
+        games = [tuple(map(int, s.split('-'))) for s in (match.get('set_scores') or "").split()]
+        if games: margins[sum(1 if a > b else -1 for a, b in games), sum(a - b for a, b in games)] += 1
+    return margins or _DEFAULT_MARGINS
+
+
+def _qualification_jobs(cat_name, cat_data, num_advancing, simulations, seed, max_work):
+    """One job per group: the teams' current ranking keys plus the ties and rubbers still to play."""
+    import numpy as np
+    teams = cat_data.get('teams') or {}
+    groups = defaultdict(list); [groups[info['group']].append(team) for team, info in teams.items()]
+    seeds = iter(np.random.SeedSequence(seed).spawn(len(groups)))  # per category, so its odds do not depend on what else is simulated
+    table = _index_for(cat_data, _MatchupIndex).group_table()
+    margins = _rubber_margins(cat_data)
+    criteria = [(RANKING_STATS.index(c.removeprefix("h2h_")), c.startswith("h2h_")) for c in get_ranking_criteria(cat_data)]
+    h2h = _index_for(cat_data, _HeadToHeadIndex).current() if any(is_h2h for _, is_h2h in criteria) else None
+    for group, names in sorted(groups.items()):
+        played, ties = [0] * len(names), []
+        for i, team_a in enumerate(names):
+            for j in range(i + 1, len(names)):
+                entry = table.entry(team_a, names[j]); matches = entry['matches'] if entry else ()
+                played[i] += len(matches); played[j] += len(matches)
+                if len(matches) < 3 and not (entry and entry['result']): ties.append((i, j, entry['tally'][team_a] if entry else 0, 3 - len(matches)))
+        strength = [(teams[t]['individual_matches_won'] + 1) / (played[i] + 2) for i, t in enumerate(names)]
+        rubbers = [(i, j, k, strength[i] / (strength[i] + strength[j])) for k, (i, j, _, left) in enumerate(ties) for _ in range(left)]
+        pairs = [[h2h.pairs.get((a, b), [0, 0, 0, 0]) for b in names] for a in names] if h2h else None
+        runs = min(simulations, max(_QUALIFICATION_MIN_SIMULATIONS, max_work // len(rubbers))) if max_work and rubbers else simulations
+        yield (cat_name, names), {"keys": [_ranking_key(teams[t]) for t in names], "pairs": pairs, "criteria": criteria, "ties": [t[:3] for t in ties],
+                                  "rubbers": rubbers, "margins": list(margins.items()), "num_advancing": num_advancing, "simulations": runs, "seed": next(seeds)}
+
+
+def _simulate_group(job):
+    """Share of simulations in which each team of the group finishes in the top `num_advancing`."""
+    import numpy as np
+    rng = np.random.default_rng(job['seed'])
+    base = np.asarray(job['keys'], dtype=np.float64); n_teams = len(base)
+    base_pairs = np.asarray(job['pairs'], dtype=np.float64).reshape(n_teams * n_teams, len(RANKING_STATS)) if job['pairs'] else None
+    total = job['simulations'] if job['rubbers'] else 1
+    # Batches shrink for big groups, so the per-rubber draws and the (team, rival) tables stay within _SIMULATION_CELLS
+    width = max(len(job['rubbers']), n_teams * n_teams if base_pairs is not None else 1)
+    batch = max(1, min(_SIMULATION_BATCH, _SIMULATION_CELLS // width))
+    counts = np.zeros(n_teams)
+    if job['rubbers']:
+        side_a, side_b, tie, odds = (np.asarray(column) for column in zip(*job['rubbers']))
+        tie_a, tie_b, tally = (np.asarray(column) for column in zip(*job['ties']))
+        pair_ab, pair_ba = side_a * n_teams + side_b, side_b * n_teams + side_a
+        tie_ab, tie_ba = tie_a * n_teams + tie_b, tie_b * n_teams + tie_a
+        margins = np.asarray([m for m, _ in job['margins']], dtype=np.float64)
+        weights = np.asarray([w for _, w in job['margins']], dtype=np.float64); weights /= weights.sum()
+    for start in range(0, total, batch):
+        n = min(batch, total - start)
+        keys = np.repeat(base[None], n, axis=0)
+        pairs = np.repeat(base_pairs[None], n, axis=0) if base_pairs is not None else None
+        if job['rubbers']:
+            # Per-simulation totals are scattered with bincount over flat (simulation, slot) indexes
+            row = np.arange(n)[:, None]
+            at = lambda slots, size: (row * size + slots).ravel()
+            scatter = lambda flat, size, values=None: np.bincount(flat, None if values is None else values.ravel(), minlength=n * size).reshape(n, size)
+            won = rng.random((n, len(odds))) < odds  # True where the first team takes the rubber
+            drawn = rng.choice(len(margins), size=(n, len(odds)), p=weights)
+            tie_won = scatter(at(tie, len(tie_a)), len(tie_a), won) + tally >= 2
+            keys[..., 0] += scatter(at(np.where(tie_won, tie_a, tie_b), n_teams), n_teams)
+            keys[..., 1] += scatter(at(np.where(won, side_a, side_b), n_teams), n_teams)
+            team_a, team_b = at(side_a, n_teams), at(side_b, n_teams)
+            if pairs is not None:
+                pairs[..., 0] += scatter(at(np.where(tie_won, tie_ab, tie_ba), n_teams * n_teams), n_teams * n_teams)
+                pairs[..., 1] += scatter(at(np.where(won, pair_ab, pair_ba), n_teams * n_teams), n_teams * n_teams)
+                rival_ab, rival_ba = at(pair_ab, n_teams * n_teams), at(pair_ba, n_teams * n_teams)
+            for field, column in ((2, 0), (3, 1)):
+                margin = margins[:, column][drawn]; diff = np.where(won, margin, -margin)
+                keys[..., field] += scatter(team_a, n_teams, diff) - scatter(team_b, n_teams, diff)
+                if pairs is not None: pairs[..., field] += scatter(rival_ab, n_teams * n_teams, diff) - scatter(rival_ba, n_teams * n_teams, diff)
+        # One column per criterion, as in rank_teams: a head-to-head one sums the pair results
+        # against the teams level with each team on every earlier column.
+        ranking = []
+        for field, is_h2h in job['criteria']:
+            if not is_h2h: ranking.append(keys[..., field]); continue
+            prefix = np.stack(ranking, axis=-1) if ranking else np.zeros((n, n_teams, 1))
+            level = (prefix[:, :, None, :] == prefix[:, None, :, :]).all(axis=-1)
+            ranking.append((level * pairs.reshape(n, n_teams, n_teams, -1)[..., field]).sum(axis=-1))
+        order = np.lexsort((np.broadcast_to(np.arange(n_teams), (n, n_teams)),) + tuple(-column for column in reversed(ranking)), axis=-1)
+        counts += np.bincount(order[:, :job['num_advancing']].ravel(), minlength=n_teams)
+    return (counts / total).tolist()
+
+
+def get_qualification_odds(data, num_advancing=2, simulations=QUALIFICATION_SIMULATIONS, seed=None, max_work=QUALIFICATION_MAX_WORK):
+    """
+    Returns {category: {team: probability of finishing in its group's top `num_advancing`}} for
+    every category still in the group stage. Groups are simulated independently, in-process,
+    with at most `max_work` simulated rubbers each (None for no cap); results are reproducible
+    when `seed` is given.
+    """
+    odds = {cat_name: {} for cat_name, cat_data in data.items() if cat_data.get('teams') and not cat_data.get('knockout')}
+    for cat_name in odds:
+        for (_, names), job in _qualification_jobs(cat_name, data[cat_name], num_advancing, simulations, seed, max_work):
+            odds[cat_name].update(zip(names, _simulate_group(job)))
+    return odds
+
+
+# --- Player statistics ---
+PLAYER_COLUMNS = ['Jugador', 'Equipo', 'PJ', 'PG', 'PP', 'SG', 'SP', 'Dif Sets', 'GG', 'GP', 'Dif Games']
+_PLAYER_MATCH_LISTS = ('individual_matches', 'knockout_individual_matches')
+
+
+def _new_player_stats():
+    return {"played": 0, "won": 0, "sets_won": 0, "sets_lost": 0, "games_won": 0, "games_lost": 0,
+            "singles_played": 0, "singles_won": 0, "doubles_played": 0, "doubles_won": 0,
+            "partners": defaultdict(lambda: [0, 0]), "opponents": defaultdict(lambda: [0, 0])}
+
+
+class _PlayerIndex:
+    """
+    Per-player totals over group and knockout matches, keyed by (team, normalized name), with
+    [played, won] splits per partner and per opponent for "a/b" doubles. Built on first read,
+    then kept current by _append_match; any other change to the match lists rebuilds it.
+    """
+
+    def __init__(self, cat_data):
+        self.owner = cat_data
+        self.refs, self.sizes, self.version = None, None, 0
+        self.rows, self.rows_version = [], -1
+
+    def _lists(self):
+        return tuple(self.owner.get(key) for key in _PLAYER_MATCH_LISTS)
+
+    def current(self):
+        lists = self._lists()
+        if self.refs is None or any(a is not b for a, b in zip(lists, self.refs)) or [len(m or ()) for m in lists] != self.sizes:
+            self.players, self.spellings = {}, {}
+            for matches in lists:
+                for match in matches or (): self._count(match)
+            self.refs, self.sizes = lists, [len(m or ()) for m in lists]; self.version += 1
+        return self
+
+    def add(self, key, match):
+        """Counts a match just appended to cat_data[key]; skipped (and rebuilt on the next read) when out of sync."""
+        if self.refs is None: return
+        i, lists = _PLAYER_MATCH_LISTS.index(key), self._lists()
+        if lists[i] is not self.refs[i] and self.sizes[i] == 0: self.refs = lists  # first match created the list
+        if any(a is not b for a, b in zip(lists, self.refs)) or len(lists[i]) - 1 != self.sizes[i]: return
+        self._count(match); self.sizes[i] += 1; self.version += 1
+
+    def _side(self, players, team):
+        keys = []
+        for name in players.split("/"):
+            key = (team, _normalize_name(name)); self.spellings.setdefault(key, name.strip()); keys.append(key)
+        return keys
+
+    def _count(self, match):
+        games = [tuple(map(int, s.split('-'))) for s in (match.get('set_scores') or "").split()]
+        sets1 = sum(1 for g1, g2 in games if g1 > g2); g1_total = sum(g[0] for g in games); g2_total = sum(g[1] for g in games)
+        side1, side2 = self._side(match['p1'], match['team1']), self._side(match['p2'], match['team2'])
+        side1_won = match['winner'] == match['team1']
+        for side, rivals, won, sets_won, sets_lost, games_won, games_lost in (
+                (side1, side2, side1_won, sets1, len(games) - sets1, g1_total, g2_total),
+                (side2, side1, not side1_won, len(games) - sets1, sets1, g2_total, g1_total)):
+            kind = "doubles" if len(side) > 1 else "singles"
+            for key in side:
+                stats = self.players.get(key) or self.players.setdefault(key, _new_player_stats())
+                stats['played'] += 1; stats['won'] += won; stats[f'{kind}_played'] += 1; stats[f'{kind}_won'] += won
+                stats['sets_won'] += sets_won; stats['sets_lost'] += sets_lost; stats['games_won'] += games_won; stats['games_lost'] += games_lost
+                for partner in side:
+                    if partner != key: stats['partners'][partner][0] += 1; stats['partners'][partner][1] += won
+                for rival in rivals: stats['opponents'][rival][0] += 1; stats['opponents'][rival][1] += won
+
+    def display_name(self, key):
+        """The roster's spelling of the player (title-cased, as the admin panel lists it) when the team lists them, otherwise the first spelling recorded."""
+        team_info = (self.owner.get('teams') or {}).get(key[0]) or {}
+        rostered = next((p for p in team_info.get('players', []) if _normalize_name(p) == key[1]), None)
+        return rostered.title() if rostered else self.spellings.get(key, key[1])
+
+    def leaderboard(self):
+        self.current()
+        if self.rows_version != self.version:
+            rows = []
+            for key, stats in self.players.items():
+                rows.append({'Jugador': self.display_name(key), 'Equipo': key[0], 'PJ': stats['played'], 'PG': stats['won'], 'PP': stats['played'] - stats['won'],
+                             'SG': stats['sets_won'], 'SP': stats['sets_lost'], 'Dif Sets': stats['sets_won'] - stats['sets_lost'],
+                             'GG': stats['games_won'], 'GP': stats['games_lost'], 'Dif Games': stats['games_won'] - stats['games_lost']})
+            rows.sort(key=lambda r: (r['Jugador'], r['Equipo']))
+            rows.sort(key=lambda r: (r['PG'], r['Dif Sets'], r['Dif Games']), reverse=True)
+            self.rows, self.rows_version = rows, self.version
+        return self.rows
+
+
+def get_player_leaderboard(cat_data, limit=None):
+    """Player rows (PLAYER_COLUMNS keys) ranked by wins, then set and game difference. Rows are shared; do not modify them."""
+    rows = _index_for(cat_data, _PlayerIndex).leaderboard()
+    return rows[:limit] if limit else rows
+
+
+def get_player_breakdown(cat_data, team, player):
+    """Totals of one player plus [{"Jugador", "Equipo", "PJ", "PG"}] rows per partner and per opponent; None if they never played."""
+    index = _index_for(cat_data, _PlayerIndex).current()
+    stats = index.players.get((team, _normalize_name(player)))
+    if stats is None: return None
+    split = lambda counts: sorted(({'Jugador': index.display_name(k), 'Equipo': k[0], 'PJ': c[0], 'PG': c[1]} for k, c in counts.items()), key=lambda r: (-r['PJ'], r['Jugador']))
+    totals = {k: v for k, v in stats.items() if k not in ('partners', 'opponents')}
+    return {"totals": totals, "partners": split(stats['partners']), "opponents": split(stats['opponents'])}
+
+
+class _KnockoutState:
+    """
+    Per-tie state of a category's bracket: matches played, tally, provisional and final winner,
+    plus the number of ties still open in each round. Results update it in O(1); the round
+    advances when its last open tie is decided.
+    """
+
+    def __init__(self, cat_data):
+        self.owner = cat_data
+        self.rounds_ref = self.matches_ref = None; self.size = None
+
+    def _sync(self):
+        """Holds the lists themselves (not their ids) so a replaced list can never pass for the old one."""
+        self.rounds_ref, self.matches_ref = self.owner.get('knockout'), self.owner.get('knockout_individual_matches')
+        self.size = (len(self.rounds_ref or ()), len(self.matches_ref or ()))
+
+    def current(self):
+        rounds, matches = self.owner.get('knockout'), self.owner.get('knockout_individual_matches')
+        if rounds is not self.rounds_ref or matches is not self.matches_ref or self.size != (len(rounds or ()), len(matches or ())): self._rebuild()
+        return self
+
+    def _rebuild(self):
+        self.ties, self.open = {}, []
+        for matchups in self.owner.get('knockout') or (): self._add_round(matchups)
+        for match in self.owner.get('knockout_individual_matches') or ():
+            tie = self.ties.get(frozenset((match['team1'], match['team2'])))
+            if tie: self._score(tie, match['winner'])
+        self._sync()
+
+    def _add_round(self, matchups):
+        round_idx = len(self.open); self.open.append(0)
+        for team_a, team_b in matchups:
+            if "BYE" in (team_a, team_b): continue  # decided on sight by tie_winner
+            self.ties[frozenset((team_a, team_b))] = {"round": round_idx, "teams": (team_a, team_b), "played": 0,
+                                                      "tally": defaultdict(int), "provisional": None, "winner": None}
+            self.open[round_idx] += 1
+
+    def _score(self, tie, winner):
+        tie['played'] += 1; tie['tally'][winner] += 1
+        if tie['provisional'] is None and tie['tally'][winner] >= 2: tie['provisional'] = winner
+        if tie['played'] == 3 and tie['winner'] is None:
+            tie['winner'] = max(tie['tally'], key=tie['tally'].get); self.open[tie['round']] -= 1
+
+    def tie(self, team_a, team_b):
+        return self.ties.get(frozenset((team_a, team_b)))
+
+    def winner(self, team_a, team_b):
+        if team_b == "BYE": return team_a
+        if team_a == "BYE": return team_b
+        tie = self.tie(team_a, team_b)
+        return tie['winner'] if tie else None
+
+    def record(self, tie, winner):
+        """Counts a result already appended to knockout_individual_matches and advances the bracket if it closed the round."""
+        self._score(tie, winner)
+        if tie['winner'] is not None and tie['round'] == len(self.open) - 1 and self.open[-1] == 0: self._advance()
+        self._sync()
+
+    def _advance(self):
+        winners = [self.winner(team_a, team_b) for team_a, team_b in self.owner['knockout'][-1]]
+        if len(winners) == 1: self.owner['champion'] = winners[0]; return
+        next_round = [(winners[i], winners[i+1] if i+1 < len(winners) else "BYE") for i in range(0, len(winners), 2)]
+        self.owner['knockout'].append(next_round); self._add_round(next_round)
+
+
+def _knockout_state(cat_data):
+    return _index_for(cat_data, _KnockoutState).current()
 
 
 def _get_ko_provisional_winner(cat_data, team_a, team_b):
     if team_b == "BYE": return team_a
     if team_a == "BYE": return team_b
-    tally = defaultdict(int)
-    for match in cat_data.get('knockout_individual_matches', []):
-        if {match['team1'], match['team2']} == {team_a, team_b}: tally[match['winner']] += 1
-    if tally[team_a] >= 2: return team_a
-    if tally[team_b] >= 2: return team_b
-    return None
+    tie = _knockout_state(cat_data).tie(team_a, team_b)
+    return tie['provisional'] if tie else None
 
 
 def _get_ko_final_winner(cat_data, team_a, team_b):
-    if team_b == "BYE": return team_a
-    if team_a == "BYE": return team_b
-    matches_between = [m for m in cat_data.get('knockout_individual_matches', []) if {m['team1'], m['team2']} == {team_a, team_b}]
-    if len(matches_between) < 3: return None
-    tally = defaultdict(int)
-    for match in matches_between: tally[match['winner']] += 1
-    return max(tally, key=tally.get) if tally else None
-
-
-def _check_and_generate_next_round(cat_data):
-    if not cat_data.get('knockout'): return
-    current_round_matchups = cat_data['knockout'][-1]
-    winners_this_round, all_decided = [], True
-    for team_a, team_b in current_round_matchups:
-        winner = _get_ko_final_winner(cat_data, team_a, team_b)
-        if winner: winners_this_round.append(winner)
-        else: all_decided = False; break
-    if all_decided:
-        if len(winners_this_round) == 1: cat_data['champion'] = winners_this_round[0]
-        else:
-            next_round = [(winners_this_round[i], winners_this_round[i+1] if i+1 < len(winners_this_round) else "BYE") for i in range(0, len(winners_this_round), 2)]
-            cat_data['knockout'].append(next_round)
-            
-            
+    return _knockout_state(cat_data).winner(team_a, team_b)
+
+
 def record_knockout_match(cat_data, result_line):
     p1, p2, s1, s2, g1, g2, set_scores = parse_match_result(result_line)
     t1 = identify_team(p1, cat_data['teams']); t2 = identify_team(p2, cat_data['teams'])
     if not t1 or not t2: raise ValueError(f"No se pudo identificar equipos para: {p1}, {p2}")
-    current_round_matchups = cat_data['knockout'][-1]; match_found = False
-    for team_a, team_b in current_round_matchups:
-        if {t1, t2} == {team_a, team_b}:
-            matches_between = [m for m in cat_data.get('knockout_individual_matches', []) if {m['team1'], m['team2']} == {t1, t2}]
-            if len(matches_between) >= 3: raise ValueError(f"Ya se han jugado 3 partidos entre {t1} y {t2}.")
-            match_found = True; break
-    if not match_found: raise ValueError(f"No se encontró un enfrentamiento activo entre {t1} y {t2}.")
+    state = _knockout_state(cat_data); tie = state.tie(t1, t2)
+    if not tie or tie['round'] != len(cat_data['knockout']) - 1: raise ValueError(f"No se encontró un enfrentamiento activo entre {t1} y {t2}.")
+    if tie['played'] >= 3: raise ValueError(f"Ya se han jugado 3 partidos entre {t1} y {t2}.")
     winner_team = t1 if s1 > s2 else t2
-    cat_data.setdefault('knockout_individual_matches', []).append({"p1": p1, "p2": p2, "team1": t1, "team2": t2, "winner": winner_team, "set_scores": set_scores})
-    _check_and_generate_next_round(cat_data)
+    _append_match(cat_data, 'knockout_individual_matches', {"p1": p1, "p2": p2, "team1": t1, "team2": t2, "winner": winner_team, "set_scores": set_scores})
+    state.record(tie, winner_team)
+    _log_mutation(cat_data, "knockout_match", line=result_line)
     return f"Partido de eliminatoria registrado: {winner_team} gana."
 
 
-def generate_knockout_bracket(cat_data, num_advancing, bracket_size):
+def _seed_slots(bracket_size):
+    """Seed number (1-based) at each bracket position, in standard order: 1 and 2 can only meet in the final."""
+    slots = [1]
+    while len(slots) < bracket_size:
+        n = len(slots) * 2 + 1; slots = [s for seed in slots for s in (seed, n - seed)]
+    return slots
+
+
+def generate_knockout_bracket(cat_data, num_advancing, bracket_size, seed=None):
     
-    """Generates a knockout bracket based on the current category data."""
+    """
+    Generates a knockout bracket based on the current category data. Group winners are drawn
+    into the top seeds, runners-up into the next ones and so on; byes go to the top seeds and
+    teams from the same group are kept as far apart in the bracket as possible. The draw is
+    reproducible when `seed` is given.
+    """
     
-    if num_advancing != 2:
-        groups = defaultdict(list); [groups[d['group']].append((team, d)) for team, d in cat_data['teams'].items()]
-        qualifiers = []
-        for group, group_teams in sorted(groups.items()):
-            sorted_teams = sorted(group_teams, key=lambda kv: (kv[1]['team_matches_won'], kv[1]['individual_matches_won'], kv[1]['sets_won'] - kv[1]['sets_lost'], kv[1]['games_won'] - kv[1]['games_lost']), reverse=True)
-            qualifiers.extend([t[0] for t in sorted_teams[:num_advancing]])
-        while len(qualifiers) < bracket_size: qualifiers.append("BYE")
-        random.shuffle(qualifiers); matchups = [(qualifiers[i], qualifiers[i+1]) for i in range(0, bracket_size, 2)]
-    else:
-        first_place_pot, second_place_pot = [], []
-        groups = defaultdict(list); [groups[d['group']].append((team, d)) for team, d in cat_data['teams'].items()]
-        for group, group_teams in sorted(groups.items()):
-            sorted_teams = sorted(group_teams, key=lambda kv: (kv[1]['team_matches_won'], kv[1]['individual_matches_won'], kv[1]['sets_won'] - kv[1]['sets_lost'], kv[1]['games_won'] - kv[1]['games_lost']), reverse=True)
-            if len(sorted_teams) > 0: first_place_pot.append({'name': sorted_teams[0][0], 'group': group})
-            if len(sorted_teams) > 1: second_place_pot.append({'name': sorted_teams[1][0], 'group': group})
-        while len(first_place_pot) + len(second_place_pot) < bracket_size:
-            second_place_pot.append({'name': "BYE", 'group': "BYE_GROUP"})
-        random.shuffle(first_place_pot); random.shuffle(second_place_pot)
-        matchups, available_seconds = [], list(second_place_pot)
-        for first_team in first_place_pot:
-            best_partner = next((p for p in available_seconds if first_team['group'] != p['group']), None)
-            if best_partner is None and available_seconds: best_partner = available_seconds[0]
-            if best_partner:
-                matchups.append((first_team['name'], best_partner['name'])); available_seconds.remove(best_partner)
-    cat_data['knockout'] = [matchups]; cat_data['knockout_individual_matches'] = []
-    cat_data.pop('champion', None)
+    rng = random.Random(seed) if seed is not None else random
+    tiers = [[] for _ in range(num_advancing)]
+    for group, rows in get_standings_rows(cat_data).items():
+        for place, row in enumerate(rows[:num_advancing]): tiers[place].append((row['Equipo'], group))
+    num_qualifiers = sum(len(tier) for tier in tiers)
+    if num_qualifiers < 2: raise ValueError(f"Se necesitan al menos 2 equipos clasificados para generar el cuadro (hay {num_qualifiers}).")
+    if num_qualifiers > bracket_size: raise ValueError(f"El cuadro de {bracket_size} no alcanza para {num_qualifiers} equipos clasificados.")
+    while bracket_size > 2 and bracket_size // 2 >= num_qualifiers: bracket_size //= 2  # no bye-vs-bye ties
+
+    # Each tier is drawn into its own block of seed numbers, picking for every team the free
+    # slot that meets an already placed group mate in the latest possible round.
+    slots = _seed_slots(bracket_size); seed_slot = {s: i for i, s in enumerate(slots)}
+    bracket, placed_by_group, next_seed = ["BYE"] * bracket_size, defaultdict(list), 1
+    latest_round = (bracket_size - 1).bit_length()
+    for tier in tiers:
+        rng.shuffle(tier)
+        free = [seed_slot[s] for s in range(next_seed, next_seed + len(tier))]; next_seed += len(tier)
+        for team, group in tier:
+            mates, best, best_round = placed_by_group[group], 0, -1
+            for i, slot in enumerate(free):
+                meet = min(((slot ^ other).bit_length() for other in mates), default=latest_round)
+                if meet > best_round: best, best_round = i, meet
+                if meet == latest_round: break
+            slot = free.pop(best); bracket[slot] = team; mates.append(slot)
+    matchups = [(bracket[i], bracket[i+1]) if bracket[i] != "BYE" else (bracket[i+1], "BYE") for i in range(0, bracket_size, 2)]
+    _set_knockout(cat_data, [matchups])
+    _log_mutation(cat_data, "knockout", rounds=[[list(m) for m in r] for r in cat_data['knockout']])
     return f"Eliminatoria de {bracket_size} generada."
 
 
+def _set_knockout(cat_data, rounds):
+    cat_data['knockout'] = [[tuple(m) for m in r] for r in rounds]; cat_data['knockout_individual_matches'] = []
+    cat_data.pop('champion', None)
+
+
+# --- Fixtures and court schedule ---
+# The round-robin of every group is laid out on shared courts and time slots. Results are
+# matched to fixtures by team pair, so recording a match needs no schedule bookkeeping.
+SCHEDULE_RUBBERS = ["Individual 1", "Individual 2", "Dobles"]
+_TIME_RE = re.compile(r"^(\d{1,2}):(\d{2})$")
+
+
+def _round_robin(teams):
+    """Circle-method rounds of (team_a, team_b) pairs; every team plays once per round."""
+    teams = list(teams) + ([None] if len(teams) % 2 else [])
+    rounds = []
+    for _ in range(len(teams) - 1):
+        pairs = [(teams[i], teams[-1 - i]) for i in range(len(teams) // 2)]
+        rounds.append([p for p in pairs if None not in p])
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return rounds
+
+
+def _slot_time(slot, start_minutes, slot_minutes, slots_per_day):
+    day, index = divmod(slot, slots_per_day); minutes = start_minutes + index * slot_minutes
+    return f"Día {day + 1} {minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def generate_schedule(data, courts, rest_slots=1, start="09:00", slot_minutes=90, slots_per_day=8):
+    """
+    Builds the round-robin fixture of every group in every category and gives each rubber a
+    court and a time slot. Courts are shared by all categories. The rubbers of a tie are played
+    by different players, so they may share a slot; a team starts its next tie only after
+    `rest_slots` free slots. Stores the fixtures in cat_data['schedule'].
+    """
+    match = _TIME_RE.match(start.strip())
+    if not match or int(match.group(1)) > 23 or int(match.group(2)) > 59: raise ValueError(f"Hora de inicio inválida: {start}")
+    if courts < 1 or slot_minutes < 1 or slots_per_day < 1 or rest_slots < 0: raise ValueError("Parámetros de programación inválidos.")
+    start_minutes = int(match.group(1)) * 60 + int(match.group(2))
+    if start_minutes + slots_per_day * slot_minutes > 24 * 60:
+        raise ValueError(f"{slots_per_day} turnos de {slot_minutes} minutos desde las {start.strip()} terminan después de la medianoche; reduce los turnos por día o su duración.")
+
+    # Ties are queued round by round across all groups, so every group advances evenly.
+    queue = []
+    for cat_index, (cat_name, cat_data) in enumerate(data.items()):
+        cat_data['schedule'] = []
+        groups = defaultdict(list)
+        for team, info in (cat_data.get('teams') or {}).items(): groups[info['group']].append(team)
+        for group, group_teams in sorted(groups.items()):
+            for round_idx, pairs in enumerate(_round_robin(group_teams)):
+                for team_a, team_b in pairs:
+                    fixture = {"id": f"{group}-{len(cat_data['schedule']) + 1}", "group": group, "round": round_idx + 1, "teams": [team_a, team_b], "rubbers": []}
+                    cat_data['schedule'].append(fixture)
+                    queue.append((round_idx, cat_index, len(queue), cat_name, fixture))
+    queue.sort(key=lambda item: item[:3])
+
+    # Slot by slot: ties already on court take the free courts first, then queued ties whose
+    # teams have rested, in queue order.
+    free_from, slot, on_court, courts_left = defaultdict(int), 0, [], courts
+
+    def play(cat_name, fixture):
+        """Puts as many of the fixture's remaining rubbers on court as fit; True once all are placed."""
+        nonlocal courts_left
+        while courts_left and len(fixture['rubbers']) < len(SCHEDULE_RUBBERS):
+            fixture['rubbers'].append({"name": SCHEDULE_RUBBERS[len(fixture['rubbers'])], "court": courts - courts_left + 1, "slot": slot,
+                                       "time": _slot_time(slot, start_minutes, slot_minutes, slots_per_day)})
+            courts_left -= 1
+        done = len(fixture['rubbers']) == len(SCHEDULE_RUBBERS)
+        for t in fixture['teams']: free_from[cat_name, t] = slot + 1 + rest_slots if done else float('inf')
+        return done
+
+    while queue or on_court:
+        courts_left, waiting = courts, []
+        on_court = [item for item in on_court if not play(item[3], item[4])]
+        for i, item in enumerate(queue):
+            if not courts_left: waiting.extend(queue[i:]); break
+            cat_name, fixture = item[3], item[4]
+            if any(free_from[cat_name, t] > slot for t in fixture['teams']): waiting.append(item)
+            elif not play(cat_name, fixture): on_court.append(item)
+        queue = waiting; slot += 1
+
+    for cat_data in data.values(): _log_mutation(cat_data, "schedule", fixtures=cat_data['schedule'])
+    ties = sum(len(cat_data['schedule']) for cat_data in data.values())
+    return f"{ties} enfrentamientos programados en {slot} turnos."
+
+
+def _fixture_progress(cat_data, fixture):
+    """Number of the fixture's rubbers already played, or None when a team no longer exists."""
+    team_a, team_b = fixture['teams']
+    if team_a not in cat_data.get('teams', {}) or team_b not in cat_data.get('teams', {}): return None
+    return min(len(get_matches_between(cat_data, team_a, team_b)), len(fixture['rubbers']))
+
+
+def get_schedule_rows(cat_data):
+    """One row per scheduled rubber: [group, round, team 1, team 2, rubber, court, time, status]."""
+    rows = []
+    for fixture in cat_data.get('schedule') or ():
+        played = _fixture_progress(cat_data, fixture)
+        for i, rubber in enumerate(fixture['rubbers']):
+            status = "Anulado" if played is None else "Jugado" if i < played else "Pendiente"
+            rows.append([fixture['group'], fixture['round'], *fixture['teams'], rubber['name'], rubber['court'], rubber['time'], status])
+    return rows
+
+
+def get_next_on_court(data, per_court=1):
+    """The earliest pending rubbers on each court across all categories, ordered by court then slot."""
+    pending = defaultdict(list)
+    for cat_name, cat_data in data.items():
+        for fixture in cat_data.get('schedule') or ():
+            played = _fixture_progress(cat_data, fixture)
+            if played is None: continue
+            for rubber in fixture['rubbers'][played:]:
+                pending[rubber['court']].append((rubber['slot'], cat_name, fixture, rubber))
+    next_up = []
+    for court in sorted(pending):
+        for slot, cat_name, fixture, rubber in sorted(pending[court], key=lambda item: item[0])[:per_court]:
+            next_up.append({"court": court, "time": rubber['time'], "category": cat_name, "group": fixture['group'],
+                            "teams": list(fixture['teams']), "rubber": rubber['name']})
+    return next_up
+
+
+# --- Bracket render cache ---
+# Keyed by a hash of the knockout state, so an unchanged bracket never repeats graph
+# building, layout or the `dot` subprocess. Least recently used entries are evicted
+# once the cached DOT sources and images exceed the byte cap.
+_RENDER_CACHE_MAX_BYTES = 32 * 1024 * 1024
+_render_cache = OrderedDict()
+_render_cache_bytes = 0
+_render_lock = threading.Lock()
+
+
+def _bracket_key(cat_data):
+    state = [cat_data.get('knockout') or [], list(cat_data.get('knockout_individual_matches') or []), cat_data.get('champion')]
+    return hashlib.sha1(json.dumps(state, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+def _bracket_entry(cat_data):
+    key = _bracket_key(cat_data)
+    with _render_lock:
+        entry = _render_cache.get(key)
+        if entry is not None:
+            _render_cache.move_to_end(key)
+            return entry
+    dot = _build_bracket_graph(cat_data)
+    entry = {"dot": dot, "source": dot.source}
+    _store_render(key, entry)
+    return entry
+
+
+def _store_render(key, entry):
+    global _render_cache_bytes
+    with _render_lock:
+        size = len(entry['source']) + sum(len(v) for k, v in entry.items() if isinstance(v, bytes))
+        previous = _render_cache.get(key)
+        if previous is not None: _render_cache_bytes -= previous['bytes']
+        _render_cache[key] = entry; entry['bytes'] = size; _render_cache_bytes += size
+        while _render_cache_bytes > _RENDER_CACHE_MAX_BYTES and len(_render_cache) > 1:
+            _, evicted = _render_cache.popitem(last=False); _render_cache_bytes -= evicted['bytes']
+
+
 def generate_bracket_image(cat_data):
-    import graphviz
     if not cat_data.get('knockout'):
         return None
+    return _bracket_entry(cat_data)['dot'].copy()
+
+
+def get_bracket_source(cat_data):
+    """Returns the bracket's DOT source, or None when there is no knockout phase."""
+    if not cat_data.get('knockout'): return None
+    return _bracket_entry(cat_data)['source']
 
+
+def render_bracket(cat_data, fmt='svg'):
+    """Returns the bracket rendered by graphviz as bytes (e.g. 'svg' or 'png'), or None when there is no knockout phase."""
+    if not cat_data.get('knockout'): return None
+    entry = _bracket_entry(cat_data)
+    if fmt not in entry:
+        image = entry['dot'].pipe(format=fmt)
+        with _render_lock: entry.setdefault(fmt, image)
+        _store_render(_bracket_key(cat_data), entry)
+    return entry[fmt]
+
+
+def _build_bracket_graph(cat_data):
+    import graphviz
     dot = graphviz.Digraph(graph_attr={
         'splines': 'polyline',
         'rankdir': 'LR',
@@ -234,6 +1366,8 @@ def generate_bracket_image(cat_data):
         elif round_len == 4: round_name = "Cuartos de Final"
         elif round_len == 8: round_name = "Octavos de Final"
         elif round_len == 16: round_name = "Dieciseisavos de Final"
+        elif round_len == 32: round_name = "Treintaidosavos de Final"
+        elif round_len >= 64: round_name = f"Ronda de {round_len * 2}"
 
         round_nodes[r_idx] = []
 
@@ -294,38 +1428,40 @@ def generate_bracket_image(cat_data):
 
 def reset_knockout_phase(cat_data):
     cat_data['knockout'] = []; cat_data['knockout_individual_matches'] = []; cat_data.pop('champion', None)
+    _log_mutation(cat_data, "reset_knockout")
     return "La fase eliminatoria ha sido reiniciada."
 
 
 
 def _write_formatted_standings(writer, sheet_name, cat_data):
     """Writes the group standings with custom formatting to a specific sheet."""
-    workbook = writer.book
-    worksheet = writer.book.get_worksheet_by_name(sheet_name)
+    return _write_standings(writer.book, writer.book.get_worksheet_by_name(sheet_name), cat_data)
+
+
+def _write_standings(workbook, worksheet, cat_data):
+    """Writes each group as a header, a column row and whole data rows, strictly top to bottom (safe for constant_memory)."""
     group_header_format = workbook.add_format({'bold': True, 'align': 'center', 'valign': 'vcenter', 'font_size': 12, 'border': 1, 'bg_color': '#D3D3D3'})
     table_header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'bg_color': '#F2F2F2'})
     cell_format = workbook.add_format({'border': 1, 'align': 'center'})
-    standings_df = get_standings_df(cat_data)
-    if standings_df.empty: return 0
-    num_cols = len(standings_df.columns)
+    worksheet.set_column('A:A', 18)
+    worksheet.set_column('B:K', 10)
+    group_rows = get_standings_rows(cat_data)
+    if not group_rows: return 0
+    columns = STANDINGS_COLUMNS[1:]
     start_row = 0
-    for group_name, group_df in standings_df.groupby('Grupo'):
+    for group_name, rows in group_rows.items():
         if start_row > 0: start_row += 1
-        worksheet.merge_range(start_row, 0, start_row, num_cols - 2, f"GRUPO {group_name}", group_header_format)
-        start_row += 1
-        for col_num, value in enumerate(group_df.columns[1:]):
-            worksheet.write(start_row, col_num, value, table_header_format)
-        start_row += 1
-        for _, row_data in group_df.iterrows():
-            for col_num, value in enumerate(row_data.values[1:]):
-                worksheet.write(start_row, col_num, value, cell_format)
+        worksheet.merge_range(start_row, 0, start_row, len(columns) - 1, f"GRUPO {group_name}", group_header_format)
+        worksheet.write_row(start_row + 1, 0, columns, table_header_format)
+        start_row += 2
+        for row in rows:
+            worksheet.write_row(start_row, 0, [row[c] for c in columns], cell_format)
             start_row += 1
-    worksheet.set_column('A:A', 18)
-    worksheet.set_column('B:K', 10)
     return start_row
 
 def export_category_to_excel(cat_data):
     """Generates an in-memory Excel file for a single category with an embedded bracket image."""
+    import pandas as pd
     output = io.BytesIO()
     with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
         sheet_name = "Resultados del Torneo"
@@ -334,11 +1470,13 @@ def export_category_to_excel(cat_data):
         # Write the formatted standings and get the next available row
         next_row = _write_formatted_standings(writer, sheet_name, cat_data)
         
-        # Generate the bracket image in memory
-        bracket_dot = generate_bracket_image(cat_data)
-        if bracket_dot:
-            # Render the Graphviz object to a PNG image in a bytes buffer
-            png_image_data = bracket_dot.pipe(format='png')
+        # Render the bracket to PNG (served from the render cache when unchanged)
+        import graphviz
+        try: png_image_data = render_bracket(cat_data, 'png')
+        except (graphviz.ExecutableNotFound, graphviz.CalledProcessError):
+            png_image_data = None
+            writer.book.get_worksheet_by_name(sheet_name).write(next_row + 1, 0, "Cuadro no disponible: no se pudo ejecutar Graphviz.")
+        if png_image_data:
             image_buffer = io.BytesIO(png_image_data)
             
             # Get the worksheet object and insert the image
@@ -349,4 +1487,334 @@ def export_category_to_excel(cat_data):
                 {'image_data': image_buffer}
             )
             
-    return output.getvalue()
\ No newline at end of file
+    return output.getvalue()
+
+
+# --- Whole-tournament export ---
+EXPORT_RENDER_WORKERS = 4  # threads that wait on `dot`; each render already runs in its own process
+
+
+def _render_bracket_pngs(data, folder):
+    """
+    Writes each category's bracket PNG into `folder` as soon as it is available, cached renders
+    first and the rest from `dot` runs in a thread pool as they complete, so no more than one
+    image is held here at a time. Returns ({category: path}, [categories whose bracket could
+    not be rendered, e.g. because graphviz's `dot` is not installed]).
+    """
+    import graphviz
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    paths, pending, skipped = {}, {}, []
+
+    def store(cat_name, cat_data, image):
+        entry = _bracket_entry(cat_data)
+        with _render_lock: entry.setdefault('png', image)
+        _store_render(_bracket_key(cat_data), entry)  # the render cache is bounded by _RENDER_CACHE_MAX_BYTES
+        paths[cat_name] = os.path.join(folder, f"{len(paths)}.png")
+        with open(paths[cat_name], 'wb') as f: f.write(image)
+
+    for cat_name, cat_data in data.items():
+        if not cat_data.get('knockout'): continue
+        entry = _bracket_entry(cat_data)
+        if 'png' in entry: store(cat_name, cat_data, entry['png'])
+        else: pending[cat_name] = (cat_data, entry['source'])
+    if not pending: return paths, skipped
+    with ThreadPoolExecutor(max_workers=EXPORT_RENDER_WORKERS, thread_name_prefix="export-render") as pool:
+        futures = {pool.submit(graphviz.Source(source).pipe, format='png'): cat_name for cat_name, (_, source) in pending.items()}
+        for future in as_completed(futures):
+            cat_name = futures[future]
+            try: store(cat_name, pending[cat_name][0], future.result())
+            except (graphviz.ExecutableNotFound, graphviz.CalledProcessError): skipped.append(cat_name)
+    return paths, [cat_name for cat_name in data if cat_name in skipped]
+
+
+def _sheet_names(categories):
+    names, used = {}, set()
+    for cat_name in categories:
+        base = re.sub(r'[\[\]:*?/\\]', '_', str(cat_name))[:31] or "Categoria"
+        name, n = base, 2
+        while name.lower() in used: suffix = f" ({n})"; name = base[:31 - len(suffix)] + suffix; n += 1
+        used.add(name.lower()); names[cat_name] = name
+    return names
+
+
+def export_tournament_to_excel(data, path=None):
+    """
+    Builds one workbook with a sheet per category (standings plus bracket image).
+    Rows are streamed with xlsxwriter's constant_memory mode and bracket images are spooled
+    to temporary files that xlsxwriter copies in on close, so memory stays flat however big
+    the tournament is. Writes to `path` when given. Returns (the file's bytes, or None when
+    written to `path`, [categories exported without their bracket image]).
+    """
+    import tempfile
+    import xlsxwriter
+    output = path or io.BytesIO()
+    with tempfile.TemporaryDirectory() as folder:
+        pngs, skipped = _render_bracket_pngs(data, folder)
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+        for cat_name, sheet_name in _sheet_names(data).items():
+            worksheet = workbook.add_worksheet(sheet_name)
+            next_row = _write_standings(workbook, worksheet, data[cat_name])
+            if cat_name in pngs: worksheet.insert_image(next_row + 1, 0, pngs[cat_name])
+        workbook.close()
+    return (None if path else output.getvalue()), skipped
+
+
+
+# --- Display snapshots ---
+# save_data writes a ready-to-show artifact per category next to the data file, so the
+# public screen only reads and displays: sorted standings, the bracket's DOT source and the
+# most recent results and qualification odds. Only the categories a save touched are
+# rewritten, and their odds are simulated in-process on a small budget; the bracket SVG is
+# rendered by the public screen's background view builder, off the admin's save path.
+DISPLAY_RECENT_MATCHES = 10
+DISPLAY_LEADERBOARD_SIZE = 10
+DISPLAY_QUALIFIERS = 2  # teams per group the public screen's odds assume; the real number is picked when drawing the bracket
+DISPLAY_SIMULATIONS = 2000  # enough for whole percentages, cheap enough to run on every save
+_display_state = {"data": None, "versions": {}, "leaders": {}, "next_on_court": []}
+_COURT_QUEUE_OPS = {"init_category", "delete_category", "register_team", "delete_team", "group_match", "group_matches", "schedule"}
+_display_lock = threading.Lock()
+_json_file_cache = {}
+
+
+def display_dir():
+    return os.path.splitext(DATA_FILE)[0] + ".display"
+
+
+def category_file_name(cat_name):
+    """File-system-safe, collision-free JSON file name for a category (display snapshots and shards)."""
+    return re.sub(r'[^A-Za-z0-9_-]', '_', cat_name) + "-" + hashlib.sha1(cat_name.encode('utf-8')).hexdigest()[:8] + ".json"
+
+
+def build_display_snapshot(cat_name, cat_data):
+    """Returns the JSON-ready view of one category that the public screen displays."""
+    snapshot = {
+        "category": cat_name,
+        "standings": get_standings_rows(cat_data) if cat_data.get('teams') else {},
+        "knockout": bool(cat_data.get('knockout')),
+        "champion": cat_data.get('champion'),
+        "bracket_dot": get_bracket_source(cat_data),
+        "recent_group_matches": list((cat_data.get('individual_matches') or [])[-DISPLAY_RECENT_MATCHES:]),
+        "recent_knockout_matches": list((cat_data.get('knockout_individual_matches') or [])[-DISPLAY_RECENT_MATCHES:]),
+        "leaderboard": get_player_leaderboard(cat_data, DISPLAY_LEADERBOARD_SIZE),
+        # Seeded, so an unchanged category keeps its odds and its version
+        "qualification": get_qualification_odds({cat_name: cat_data}, DISPLAY_QUALIFIERS, DISPLAY_SIMULATIONS, seed=0).get(cat_name, {}),
+    }
+    snapshot['version'] = hashlib.sha1(json.dumps(snapshot, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    return snapshot
+
+
+def _write_json_atomic(path, obj):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f: json.dump(obj, f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+
+
+def write_display_snapshots(data, records=None):
+    """Rebuilds the snapshots of the categories named in `records` (all of them for data not seen before)."""
+    with _display_lock:
+        folder = display_dir(); os.makedirs(folder, exist_ok=True)
+        known = _display_state['data'] is data and records is not None and os.path.exists(os.path.join(folder, "index.json"))
+        changed = {r.get('cat') for r in records} if known else set(data)
+        versions = {name: v for name, v in _display_state['versions'].items() if name in data} if known else {}
+        leaders = {name: v for name, v in _display_state['leaders'].items() if name in data} if known else {}
+        stale = [cat_name for cat_name in data if cat_name in changed or cat_name not in versions]
+        for cat_name in stale:
+            snapshot = build_display_snapshot(cat_name, data[cat_name])
+            _write_json_atomic(os.path.join(folder, category_file_name(cat_name)), snapshot)
+            versions[cat_name], leaders[cat_name] = snapshot['version'], bool(snapshot['leaderboard'])
+        # The public screen rotates through these: every category, plus its leaderboard once players have results
+        slides = [[n, kind] for n in data for kind in ("main", "leaders") if kind == "main" or leaders.get(n)]
+        if not known or any(r['op'] in _COURT_QUEUE_OPS for r in records): _display_state['next_on_court'] = get_next_on_court(data)
+        _write_json_atomic(os.path.join(folder, "index.json"), {"categories": list(data), "files": {n: category_file_name(n) for n in data}, "versions": versions,
+                                                                "slides": slides, "next_on_court": _display_state['next_on_court']})
+        for name in os.listdir(folder):
+            if name.endswith(".json") and name != "index.json" and name not in {category_file_name(n) for n in data}: os.remove(os.path.join(folder, name))
+        _display_state['data'], _display_state['versions'], _display_state['leaders'] = data, versions, leaders
+
+
+def _read_json_cached(path):
+    """Parses a JSON file once per (mtime, size); returns None when it does not exist."""
+    try: stat = os.stat(path)
+    except FileNotFoundError: return None
+    token = (stat.st_mtime_ns, stat.st_size)
+    cached = _json_file_cache.get(path)
+    if cached and cached[0] == token: return cached[1]
+    try:
+        with open(path, 'r', encoding='utf-8') as f: value = json.load(f)
+    except (json.JSONDecodeError, FileNotFoundError): return cached[1] if cached else None
+    _json_file_cache[path] = (token, value)
+    return value
+
+
+def load_display_index():
+    """Returns {"categories": [...], "files": {...}, "versions": {...}, "slides": [[cat, "main" | "leaders"], ...], "next_on_court": [...]}, building the snapshots once if they were never written."""
+    index = _read_json_cached(os.path.join(display_dir(), "index.json"))
+    if index is None:
+        data = load_data_cached()
+        if not data: return {"categories": [], "files": {}, "versions": {}, "slides": [], "next_on_court": []}
+        write_display_snapshots(data)
+        index = _read_json_cached(os.path.join(display_dir(), "index.json"))
+    return index
+
+
+def get_display_version(cat_name=None):
+    """Cheap change marker for a screen showing `cat_name`: the slide list, that category's snapshot version and the court queue."""
+    index = load_display_index()
+    return (json.dumps(get_display_slides(index)), index['versions'].get(cat_name), json.dumps(index.get('next_on_court', [])))
+
+
+def get_display_slides(index=None):
+    """The public screen's rotation as [cat_name, "main" | "leaders"] pairs."""
+    index = index or load_display_index()
+    return index.get('slides') or [[name, "main"] for name in index['categories']]
+
+
+def load_display_snapshot(cat_name):
+    index = load_display_index()
+    if cat_name not in index['files']: return None
+    return _read_json_cached(os.path.join(display_dir(), index['files'][cat_name]))
+
+
+# The public screen asks for the next category of its rotation ahead of time; a small thread
+# pool reads its snapshot, builds the standings frames and renders the bracket, so the switch
+# only displays them.
+# A job queued for an older snapshot version is left to finish for whoever already holds it and
+# re-queued; it is never cancelled, since another session may be waiting on it.
+DISPLAY_PREFETCH_WORKERS = 2
+_display_jobs = {}  # cat_name -> (snapshot version, future)
+_display_jobs_lock = threading.Lock()
+_display_pool = None
+
+
+def _build_display_view(cat_name):
+    snapshot = load_display_snapshot(cat_name)
+    if snapshot is None: return None
+    import pandas as pd
+    standings = {group: pd.DataFrame(rows, columns=STANDINGS_COLUMNS).drop(columns=['Grupo']).set_index('Equipo')
+                 for group, rows in (snapshot.get('standings') or {}).items()}
+    bracket_svg = None
+    if snapshot.get('knockout') and snapshot.get('bracket_dot'):
+        import graphviz
+        try: bracket_svg = graphviz.Source(snapshot['bracket_dot']).pipe(format='svg').decode('utf-8')
+        except (graphviz.ExecutableNotFound, graphviz.CalledProcessError): pass  # the screen falls back to the DOT source
+        if bracket_svg: bracket_svg = bracket_svg[bracket_svg.find('<svg'):]  # older st.image only takes markup that starts at <svg
+    odds = snapshot.get('qualification')
+    if odds:
+        for df in standings.values(): df['Clasifica'] = [f"{odds.get(team, 0):.0%}" for team in df.index]
+    return {"snapshot": snapshot, "standings": standings, "bracket_svg": bracket_svg}
+
+
+def prefetch_display_view(cat_name):
+    """Queues the view of `cat_name` in the background unless one for its current snapshot is already queued or ready."""
+    global _display_pool
+    index = load_display_index()
+    if cat_name not in index['files']: return None
+    version = index['versions'].get(cat_name)
+    with _display_jobs_lock:
+        job = _display_jobs.get(cat_name)
+        if job and job[0] == version: return job[1]
+        if _display_pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _display_pool = ThreadPoolExecutor(max_workers=DISPLAY_PREFETCH_WORKERS, thread_name_prefix="display-prefetch")
+        for name in [n for n in _display_jobs if n not in index['files']]: del _display_jobs[name]
+        future = _display_pool.submit(_build_display_view, cat_name)
+        _display_jobs[cat_name] = (version, future)
+        return future
+
+
+def get_display_view(cat_name):
+    """{"snapshot": ..., "standings": {group: DataFrame}, "bracket_svg": str | None} for the current data, waiting for a queued job if needed; None if unknown."""
+    future = prefetch_display_view(cat_name)
+    if future is None: return None
+    from concurrent.futures import CancelledError
+    try: return future.result()
+    except CancelledError: return _build_display_view(cat_name)  # the pool was shut down under us
+
+
+# --- Instrumentation ---
+# Opt-in (TENIS_PROFILE=1 or enable_instrumentation()): the public functions, plus the
+# private steps worth telling apart, are swapped in this module's namespace for timing
+# wrappers, so internal calls are measured too and nothing is paid while it is off.
+_INSTRUMENTED_PRIVATE = ("_build_bracket_graph", "_derive_category_stats", "_render_bracket_pngs")
+_INSTRUMENT_SAMPLES = 2048  # latencies kept per function for the percentiles
+_instrument_originals = {}
+_instrument_stats = {}
+_instrument_lock = threading.Lock()
+
+
+def _data_sizes(value):
+    """(teams, matches) of a category dict or of a whole tournament; None for anything else."""
+    if not isinstance(value, dict): return None
+    cats = [value] if 'teams' in value else [c for c in value.values() if isinstance(c, dict) and 'teams' in c]
+    if not cats: return None
+    return (sum(len(c.get('teams') or ()) for c in cats),
+            sum(len(c.get('individual_matches') or ()) + len(c.get('knockout_individual_matches') or ()) for c in cats))
+
+
+def _instrumented(name, fn):
+    import functools
+    import time
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start, result = time.perf_counter(), None
+        try:
+            result = fn(*args, **kwargs)
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            sizes = next((s for s in map(_data_sizes, args) if s), None) or _data_sizes(result)
+            with _instrument_lock:
+                entry = _instrument_stats.get(name)
+                if entry is None:
+                    from collections import deque
+                    entry = _instrument_stats[name] = {"calls": 0, "total": 0.0, "max": 0.0, "samples": deque(maxlen=_INSTRUMENT_SAMPLES), "teams": 0, "matches": 0}
+                entry['calls'] += 1; entry['total'] += elapsed; entry['max'] = max(entry['max'], elapsed); entry['samples'].append(elapsed)
+                if sizes: entry['teams'], entry['matches'] = max(entry['teams'], sizes[0]), max(entry['matches'], sizes[1])
+    return wrapper
+
+
+def enable_instrumentation():
+    with _instrument_lock:
+        if _instrument_originals: return
+        namespace = globals()
+        for name, fn in list(namespace.items()):
+            if callable(fn) and getattr(fn, '__module__', None) == __name__ and not isinstance(fn, type) \
+                    and (not name.startswith('_') or name in _INSTRUMENTED_PRIVATE) and 'instrument' not in name:
+                _instrument_originals[name] = fn; namespace[name] = _instrumented(name, fn)
+
+
+def disable_instrumentation():
+    with _instrument_lock:
+        globals().update(_instrument_originals); _instrument_originals.clear()
+
+
+def instrumentation_enabled():
+    return bool(_instrument_originals)
+
+
+def reset_instrumentation():
+    with _instrument_lock: _instrument_stats.clear()
+
+
+def get_instrumentation_stats():
+    """One row per measured function, slowest total first; times in milliseconds."""
+    rows = []
+    with _instrument_lock:
+        for name, entry in _instrument_stats.items():
+            samples = sorted(entry['samples'])
+            pct = lambda q: samples[round(q * (len(samples) - 1))] * 1000
+            rows.append({"function": name, "calls": entry['calls'], "total_ms": entry['total'] * 1000, "p50_ms": pct(0.5), "p95_ms": pct(0.95),
+                         "max_ms": entry['max'] * 1000, "max_teams": entry['teams'], "max_matches": entry['matches']})
+    return sorted(rows, key=lambda r: r['total_ms'], reverse=True)
+
+
+def dump_instrumentation(path=None):
+    """Returns the stats as a JSON string and, when `path` is given, also writes them there."""
+    payload = json.dumps({"enabled": instrumentation_enabled(), "storage_mode": STORAGE_MODE, "functions": get_instrumentation_stats()}, indent=4)
+    if path:
+        with open(path, 'w') as f: f.write(payload)
+    return payload
+
+
+if os.environ.get("TENIS_PROFILE") == "1": enable_instrumentation()
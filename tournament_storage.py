@@ -0,0 +1,733 @@
+# tournament_storage.py
+
+"""Alternative persistence modes for tournament_logic.load_data / save_data."""
+
+import base64
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+from types import MappingProxyType
+from urllib.request import pathname2url
+
+import tournament_logic as logic
+
+
+log = logging.getLogger(__name__)
+
+JOURNAL_COMPACT_EVERY = 500  # journal records replayed on load before save_data writes a new snapshot
+_READONLY_MESSAGE = "Los datos en caché son de solo lectura; usa load_data() para modificarlos."
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(mode, data_file):
+    with _backends_lock:
+        key = (mode, os.path.abspath(data_file))
+        if key not in _backends:
+            if mode == "journal": _backends[key] = JournalStore(data_file)
+            elif mode == "sqlite": _backends[key] = SqliteStore(sqlite_path(data_file))
+            elif mode == "sharded": _backends[key] = ShardedStore(data_file)
+            elif mode == "packed": _backends[key] = PackedStore(data_file)
+            else: raise ValueError(f"Modo de almacenamiento desconocido: {mode}")
+        return _backends[key]
+
+
+def sqlite_path(data_file):
+    return os.path.splitext(data_file)[0] + ".sqlite"
+
+
+def shards_dir(data_file):
+    return os.path.splitext(data_file)[0] + ".shards"
+
+
+def packed_path(data_file):
+    return os.path.splitext(data_file)[0] + ".packed.json"
+
+
+def _dump_compact(obj):
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text); f.flush(); os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class JournalStore:
+    """
+    Snapshot + append-only journal.
+
+    `<DATA_FILE>.snapshot` holds {"seq": n, "data": {...}} and `<DATA_FILE>.journal` holds one
+    compact mutation record per line. load() replays the records with seq > n on top of the
+    snapshot; save() appends only the records logged since the data was loaded or last saved,
+    falling back to a full snapshot when the data did not come from this journal (an upload,
+    a new tournament) or when the journal has grown past JOURNAL_COMPACT_EVERY records.
+    """
+
+    def __init__(self, data_file):
+        self.data_file = data_file
+        self.snapshot_file = f"{data_file}.snapshot"
+        self.journal_file = f"{data_file}.journal"
+        self.lock = threading.RLock()
+        self.seq, self.journal_records, self.journal_size = None, 0, None
+        self.synced = OrderedDict()  # id(data) -> (data, seq it matches)
+
+    def version_token(self):
+        stats = []
+        for path in (self.snapshot_file, self.journal_file, self.data_file):
+            try: st = os.stat(path); stats.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError: stats.append(None)
+        return tuple(stats)
+
+    # --- Reading ---
+    def _read_snapshot(self):
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            return snapshot['seq'], snapshot['data']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+        try:
+            with open(self.data_file, 'r') as f: return 0, json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError): return 0, {}
+
+    def _read_journal(self):
+        records = []
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try: records.append(json.loads(line))
+                    except json.JSONDecodeError: break  # torn tail from an interrupted append
+        except FileNotFoundError:
+            pass
+        return records
+
+    def _journal_stat(self):
+        try: return os.path.getsize(self.journal_file)
+        except FileNotFoundError: return 0
+
+    def load(self):
+        with self.lock:
+            base_seq, data = self._read_snapshot()
+            data, seq, replayed = logic._tracked(data), base_seq, 0
+            for record in self._read_journal():
+                if record.get('seq', 0) <= base_seq: continue
+                try: logic.apply_mutation(data, record)
+                except logic.InvalidMutationRecord as e: raise logic.InvalidMutationRecord(f"Diario dañado en el registro {record.get('seq')}: {e}") from e
+                except ValueError as e: log.warning("Registro %s del diario omitido, ya no aplica: %s", record.get('seq'), e)  # as the original action would have failed
+                seq = record['seq']; replayed += 1
+            logic._take_mutations(data)  # replaying re-logs every record; they are already on disk
+            self.seq, self.journal_records, self.journal_size = seq, replayed, self._journal_stat()
+            self._mark_synced(data)
+            return data
+
+    # --- Writing ---
+    def _mark_synced(self, data):
+        self.synced[id(data)] = (data, self.seq); self.synced.move_to_end(id(data))
+        while len(self.synced) > 8: self.synced.popitem(last=False)
+
+    def _is_synced(self, data):
+        entry = self.synced.get(id(data))
+        return entry is not None and entry[0] is data and entry[1] == self.seq
+
+    def save(self, data, records):
+        with self.lock:
+            if self.seq is None or self.journal_size != self._journal_stat(): self.load()  # another writer touched the files
+            if not self._is_synced(data) or self.journal_records + len(records) > JOURNAL_COMPACT_EVERY:
+                return self.compact(data)
+            if not records: return
+            lines = []
+            for record in records:
+                self.seq += 1; lines.append(_dump_compact({"seq": self.seq, **record}) + "\n")
+            self._drop_torn_tail()
+            with open(self.journal_file, 'ab') as f:
+                f.write("".join(lines).encode('utf-8')); f.flush(); os.fsync(f.fileno())
+            self.journal_records += len(records); self.journal_size = self._journal_stat()
+            self._mark_synced(data)
+
+    def _drop_torn_tail(self):
+        """Cuts a partial last line left by an interrupted append, so new records stay readable."""
+        try:
+            with open(self.journal_file, 'rb+') as f:
+                if f.seek(0, os.SEEK_END) == 0: return
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) == b"\n": return
+                f.seek(0); content = f.read()
+                f.truncate(content.rfind(b"\n") + 1)
+        except FileNotFoundError:
+            pass
+
+    def compact(self, data):
+        """Writes `data` as the new snapshot and empties the journal."""
+        with self.lock:
+            self.seq = self.seq or 0
+            _write_atomic(self.snapshot_file, _dump_compact({"seq": self.seq, "data": data}))
+            _write_atomic(self.journal_file, "")  # records up to seq are skipped on load even if this is lost
+            self.journal_records, self.journal_size = 0, 0
+            self._mark_synced(data)
+
+
+# --- Sharded JSON ---
+class ShardedStore:
+    """
+    One JSON file per category plus a manifest, in `<DATA_FILE stem>.shards/`.
+
+    The manifest lists the categories in order with their file and a per-category version.
+    save() rewrites only the categories named in the logged records, each through a temp-file
+    rename, and then the manifest; data that did not come from this store (an upload, a new
+    tournament, another writer's save) is written in full. Until the first save, load() reads
+    the combined DATA_FILE, so an existing tournament is picked up as is.
+    """
+
+    def __init__(self, data_file):
+        self.data_file = data_file
+        self.folder = shards_dir(data_file)
+        self.manifest_file = os.path.join(self.folder, "manifest.json")
+        self.lock = threading.RLock()
+        self.synced = OrderedDict()  # id(data) -> (data, manifest version it matches)
+
+    def version_token(self):
+        try: st = os.stat(self.manifest_file); return (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError: return None
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f: return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError): return None
+
+    def _read_shard(self, file_name):
+        with open(os.path.join(self.folder, file_name), 'r', encoding='utf-8') as f: return json.load(f)
+
+    def load(self):
+        with self.lock:
+            manifest = self._read_manifest()
+            if manifest is None:
+                try:
+                    with open(self.data_file, 'r') as f: return json.load(f)
+                except (FileNotFoundError, json.JSONDecodeError): return {}
+            data = logic._tracked({entry['name']: self._read_shard(entry['file']) for entry in manifest['categories']})
+            self._mark_synced(data, manifest)
+            return data
+
+    def category_names(self):
+        manifest = self._read_manifest()
+        return [e['name'] for e in manifest['categories']] if manifest is not None else list(self.load())
+
+    def load_category(self, cat_name):
+        """Reads a single category's file; None if there is no such category."""
+        manifest = self._read_manifest()
+        if manifest is None: return self.load().get(cat_name)
+        entry = next((e for e in manifest['categories'] if e['name'] == cat_name), None)
+        return self._read_shard(entry['file']) if entry else None
+
+    def _mark_synced(self, data, manifest):
+        self.synced[id(data)] = (data, manifest['version']); self.synced.move_to_end(id(data))
+        while len(self.synced) > 8: self.synced.popitem(last=False)
+
+    def save(self, data, records):
+        with self.lock:
+            manifest = self._read_manifest()
+            entry = self.synced.get(id(data))
+            if manifest is None or entry is None or entry[0] is not data or entry[1] != manifest['version']:
+                return self._write(data, manifest, set(data))
+            if records: self._write(data, manifest, {r['cat'] for r in records})
+
+    def _write(self, data, manifest, changed):
+        os.makedirs(self.folder, exist_ok=True)
+        previous = {e['name']: e for e in (manifest or {}).get('categories', [])}
+        entries = []
+        for name, cat in data.items():
+            entry = dict(previous.get(name) or {"name": name, "file": logic.category_file_name(name), "version": 0})
+            if name in changed or name not in previous:
+                _write_atomic(os.path.join(self.folder, entry['file']), _dump_compact(cat)); entry['version'] += 1
+            entries.append(entry)
+        manifest = {"version": (manifest or {}).get('version', 0) + 1, "categories": entries}
+        _write_atomic(self.manifest_file, _dump_compact(manifest))
+        if set(previous) - set(data):  # shards of deleted categories
+            keep = {e['file'] for e in entries} | {"manifest.json"}
+            for name in os.listdir(self.folder):
+                if name.endswith(".json") and name not in keep: os.remove(os.path.join(self.folder, name))
+        self._mark_synced(data, manifest)
+
+
+# --- Packed format ---
+# Match lists are the bulk of a tournament and repeat the same few hundred names. Packed,
+# every name is stored once in a string table, each match is five int32 string ids (p1, p2,
+# team1, team2, winner) and its sets are pairs of unsigned bytes. On disk the arrays are
+# base64 of their little-endian bytes.
+_MATCH_FIELDS = ("p1", "p2", "team1", "team2", "winner", "set_scores")
+_PACKED_LISTS = ("individual_matches", "knockout_individual_matches")
+_PACKED_MARK = "__packed_matches__"
+_SCORE_RE = re.compile(r"(?:0|[1-9]\d{0,2})-(?:0|[1-9]\d{0,2})(?: (?:0|[1-9]\d{0,2})-(?:0|[1-9]\d{0,2}))*")
+
+
+class _Interner:
+    def __init__(self, strings=()):
+        self.strings = list(strings); self.ids = {s: i for i, s in enumerate(self.strings)}
+
+    def __call__(self, value):
+        i = self.ids.get(value)
+        if i is None: i = self.ids[value] = len(self.strings); self.strings.append(value)
+        return i
+
+
+def _packable(match):
+    """Only matches that round-trip exactly are packed; anything else is kept as its dict."""
+    if not isinstance(match, dict) or tuple(match) != _MATCH_FIELDS or not all(isinstance(match[k], str) for k in _MATCH_FIELDS): return None
+    scores = match['set_scores']
+    if scores and not _SCORE_RE.fullmatch(scores): return None
+    games = [int(g) for s in scores.split() for g in s.split('-')] if scores else []
+    return games if all(g < 256 for g in games) else None
+
+
+def _to_b64(values):
+    if sys.byteorder == "big" and values.itemsize > 1: values = array(values.typecode, values); values.byteswap()
+    return base64.b64encode(values.tobytes()).decode('ascii')
+
+
+def _from_b64(typecode, text):
+    values = array(typecode); values.frombytes(base64.b64decode(text))
+    if sys.byteorder == "big" and values.itemsize > 1: values.byteswap()
+    return values
+
+
+class MatchTable(Sequence):
+    """
+    Compact sequence of match dicts backed by a string table shared with the other tables of
+    the same load and by integer arrays. Reading an item builds a fresh dict, so matches are
+    changed only through append, as the tournament_logic functions do. Matches that cannot be
+    packed losslessly are kept as they are in `raw`.
+    """
+
+    __slots__ = ('intern', 'rows', 'offsets', 'games', 'raw')
+
+    def __init__(self, intern, rows=None, offsets=None, games=None, raw=None):
+        self.intern = intern
+        self.rows, self.offsets, self.games = rows or array('i'), offsets or array('i', [0]), games or array('B')
+        self.raw = raw or {}
+
+    @classmethod
+    def from_dicts(cls, matches, intern):
+        table = cls(intern)
+        for match in matches: table.append(match)
+        return table
+
+    def append(self, match):
+        scores = _packable(match)
+        if scores is None: self.raw[len(self)] = match; self.rows.extend((0, 0, 0, 0, 0))
+        else: self.rows.extend([self.intern(match[k]) for k in _MATCH_FIELDS[:5]]); self.games.extend(scores)
+        self.offsets.append(len(self.games) // 2)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice): return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0: i += len(self)
+        if not 0 <= i < len(self): raise IndexError("MatchTable index out of range")
+        if i in self.raw: return dict(self.raw[i])
+        s, r, b = self.intern.strings, self.rows, 5 * i
+        g = self.games[2 * self.offsets[i]:2 * self.offsets[i + 1]]
+        return {"p1": s[r[b]], "p2": s[r[b + 1]], "team1": s[r[b + 2]], "team2": s[r[b + 3]], "winner": s[r[b + 4]],
+                "set_scores": " ".join(f"{g[k]}-{g[k + 1]}" for k in range(0, len(g), 2))}
+
+    def __iter__(self):
+        s, r, o, raw = self.intern.strings, self.rows, self.offsets, self.raw
+        sets = [f"{a}-{b}" for a, b in zip(self.games[0::2], self.games[1::2])]
+        for i in range(len(self)):
+            if i in raw: yield dict(raw[i]); continue
+            b = 5 * i
+            yield {"p1": s[r[b]], "p2": s[r[b + 1]], "team1": s[r[b + 2]], "team2": s[r[b + 3]], "winner": s[r[b + 4]],
+                   "set_scores": " ".join(sets[o[i]:o[i + 1]])}
+
+    def columns(self):
+        """(team1, team2, winner) name arrays, sets per match and a (sets, 2) games array for vectorised stats; None if any match is raw."""
+        if self.raw: return None
+        import numpy as np
+        names = np.array(self.intern.strings, dtype=object)
+        rows = np.frombuffer(self.rows, dtype=np.int32).reshape(-1, 5)
+        games = np.frombuffer(self.games, dtype=np.uint8).astype(np.int64).reshape(-1, 2)
+        return names[rows[:, 2]], names[rows[:, 3]], names[rows[:, 4]], np.diff(np.frombuffer(self.offsets, dtype=np.int32)).astype(np.int64), games
+
+    def to_json(self):
+        return {"rows": _to_b64(self.rows), "offsets": _to_b64(self.offsets), "games": _to_b64(self.games), "raw": {str(i): m for i, m in self.raw.items()}}
+
+    @classmethod
+    def from_json(cls, packed, intern):
+        return cls(intern, _from_b64('i', packed['rows']), _from_b64('i', packed['offsets']), _from_b64('B', packed['games']),
+                   {int(i): m for i, m in packed['raw'].items()})
+
+    def frozen(self, interners=None):
+        """Read-only copy for cached snapshots; `interners` maps id(interner) -> frozen interner so tables of one load keep sharing strings."""
+        interners = {} if interners is None else interners
+        intern = interners.get(id(self.intern))
+        if intern is None: intern = interners[id(self.intern)] = _FrozenInterner(self.intern.strings)
+        return _FrozenMatchTable(intern, memoryview(self.rows.tobytes()).cast('i'), memoryview(self.offsets.tobytes()).cast('i'),
+                                 memoryview(self.games.tobytes()), MappingProxyType({i: MappingProxyType(dict(m)) for i, m in self.raw.items()}))
+
+
+class _FrozenInterner:
+    __slots__ = ('strings',)
+
+    def __init__(self, strings): self.strings = tuple(strings)
+
+    def __call__(self, value): raise TypeError(_READONLY_MESSAGE)
+
+
+class _FrozenMatchTable(MatchTable):
+    """MatchTable over read-only memoryviews; append raises and copying it yields a regular MatchTable."""
+
+    __slots__ = ()
+
+    def __init__(self, intern, rows, offsets, games, raw):
+        self.intern, self.rows, self.offsets, self.games, self.raw = intern, rows, offsets, games, raw
+
+    def append(self, match): raise TypeError(_READONLY_MESSAGE)
+
+    def __reduce__(self):
+        return (MatchTable, (_Interner(self.intern.strings), array('i', self.rows), array('i', self.offsets), array('B', self.games),
+                             {i: dict(m) for i, m in self.raw.items()}))
+
+
+def pack_data(data):
+    """Returns the packed, JSON-ready form of `data`; unpack_data(pack_data(data)) == data."""
+    intern, categories = _Interner(), {}
+    for name, cat in data.items():
+        if isinstance(cat, dict):
+            cat = {k: {_PACKED_MARK: MatchTable.from_dicts(v, intern).to_json()} if k in _PACKED_LISTS and isinstance(v, (list, MatchTable)) else v
+                   for k, v in cat.items()}
+        categories[name] = cat
+    return {"format": "tenis-packed", "version": 1, "strings": intern.strings, "data": categories}
+
+
+def unpack_data(packed, compact=False):
+    """Rebuilds the dict layout; with `compact` the match lists stay MatchTables."""
+    intern, data = _Interner(packed['strings']), {}
+    for name, cat in packed['data'].items():
+        if isinstance(cat, dict):
+            cat = dict(cat)
+            for key in _PACKED_LISTS:
+                if isinstance(cat.get(key), dict) and _PACKED_MARK in cat[key]:
+                    table = MatchTable.from_json(cat[key][_PACKED_MARK], intern)
+                    cat[key] = table if compact else list(table)
+        data[name] = cat
+    return data
+
+
+class PackedStore:
+    """
+    The whole tournament in the packed format in `<DATA_FILE stem>.packed.json`, rewritten on
+    every save. Loaded data keeps its match lists as MatchTables. Until the first save, load()
+    reads the combined DATA_FILE.
+    """
+
+    def __init__(self, data_file):
+        self.data_file = data_file
+        self.path = packed_path(data_file)
+        self.lock = threading.RLock()
+
+    def version_token(self):
+        try: st = os.stat(self.path); return (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError: return None
+
+    def load(self):
+        with self.lock:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f: return unpack_data(json.load(f), compact=True)
+            except FileNotFoundError: pass
+            try:
+                with open(self.data_file, 'r') as f: return json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError): return {}
+
+    def save(self, data, records=None):
+        with self.lock: _write_atomic(self.path, _dump_compact(pack_data(data)))
+
+
+# --- SQLite ---
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS categories (
+    name TEXT PRIMARY KEY, position INTEGER NOT NULL, champion TEXT, key_order TEXT NOT NULL, extra TEXT);
+CREATE TABLE IF NOT EXISTS teams (
+    category TEXT NOT NULL, name TEXT NOT NULL, position INTEGER NOT NULL, grp TEXT,
+    team_matches_played INTEGER, team_matches_won INTEGER, individual_matches_won INTEGER,
+    sets_won INTEGER, sets_lost INTEGER, games_won INTEGER, games_lost INTEGER, key_order TEXT, extra TEXT,
+    PRIMARY KEY (category, name));
+CREATE TABLE IF NOT EXISTS players (
+    category TEXT NOT NULL, team TEXT NOT NULL, position INTEGER NOT NULL, name TEXT,
+    PRIMARY KEY (category, team, position));
+CREATE TABLE IF NOT EXISTS individual_matches (
+    category TEXT NOT NULL, seq INTEGER NOT NULL, p1 TEXT, p2 TEXT, team1 TEXT, team2 TEXT, winner TEXT, set_scores TEXT,
+    key_order TEXT, extra TEXT, PRIMARY KEY (category, seq));
+CREATE TABLE IF NOT EXISTS knockout_matches (
+    category TEXT NOT NULL, seq INTEGER NOT NULL, p1 TEXT, p2 TEXT, team1 TEXT, team2 TEXT, winner TEXT, set_scores TEXT,
+    key_order TEXT, extra TEXT, PRIMARY KEY (category, seq));
+CREATE TABLE IF NOT EXISTS team_results (
+    category TEXT NOT NULL, seq INTEGER NOT NULL, team1 TEXT, team2 TEXT, winner TEXT, score TEXT,
+    key_order TEXT, extra TEXT, PRIMARY KEY (category, seq));
+CREATE TABLE IF NOT EXISTS knockout_rounds (
+    category TEXT NOT NULL, round INTEGER NOT NULL, position INTEGER NOT NULL, team_a TEXT, team_b TEXT,
+    PRIMARY KEY (category, round, position));
+CREATE INDEX IF NOT EXISTS individual_matches_pair ON individual_matches (category, team1, team2);
+CREATE INDEX IF NOT EXISTS knockout_matches_pair ON knockout_matches (category, team1, team2);
+CREATE INDEX IF NOT EXISTS team_results_pair ON team_results (category, team1, team2);
+"""
+
+_CATEGORY_KEYS = ("teams", "team_results", "individual_matches", "knockout", "knockout_individual_matches", "champion")
+_TEAM_COLUMNS = {"group": "grp", "team_matches_played": "team_matches_played", "team_matches_won": "team_matches_won",
+                 "individual_matches_won": "individual_matches_won", "sets_won": "sets_won", "sets_lost": "sets_lost",
+                 "games_won": "games_won", "games_lost": "games_lost"}
+_TEAM_KEYS = ("group", "players", "team_matches_played", "team_matches_won", "individual_matches_won", "sets_won", "sets_lost", "games_won", "games_lost")
+_MATCH_KEYS = ("p1", "p2", "team1", "team2", "winner", "set_scores")
+_RESULT_KEYS = ("teams", "winner", "score")
+_SCALARS = (str, int, float, type(None))
+# Mutations whose rows can be synced in place; any other op rewrites its whole category.
+_INCREMENTAL_OPS = {"register_team", "delete_team", "group_match", "group_matches", "knockout_match", "knockout", "reset_knockout", "schedule", "ranking"}
+
+
+def _split_row(d, keys, is_column):
+    """Splits a dict into column values plus the JSON needed to rebuild it exactly (key order, extra keys)."""
+    columns = {k: d[k] for k in keys if k in d and is_column(k, d[k])}
+    extra = {k: v for k, v in d.items() if k not in columns}
+    key_order = None if tuple(d) == keys and not extra else _dump_compact(list(d))
+    return columns, key_order, (_dump_compact(extra) if extra else None)
+
+
+def _join_row(keys, columns, key_order, extra):
+    extra = json.loads(extra) if extra else {}
+    return {k: extra[k] if k in extra else columns.get(k) for k in (json.loads(key_order) if key_order else keys)}
+
+
+def _is_match_column(key, value): return isinstance(value, _SCALARS)
+def _is_team_column(key, value): return key == "players" and isinstance(value, list) and all(isinstance(p, _SCALARS) for p in value) or key != "players" and isinstance(value, _SCALARS)
+def _is_result_column(key, value): return (key != "teams" and isinstance(value, _SCALARS)) or (key == "teams" and isinstance(value, list) and len(value) == 2)
+
+
+class SqliteStore:
+    """
+    SQLite database with one table per kind of record, indexed by category and team pair.
+
+    save() uses the mutation log to touch only the rows a change affected: new match and
+    result rows are appended, the teams involved are upserted, and a bracket change rewrites
+    only that category's knockout tables. Data the store has not seen (an upload, a new
+    tournament) is written in full. Reads go through a separate read-only connection.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.lock = threading.RLock()
+        first_use = not os.path.exists(db_file)
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL"); self.conn.executescript(_SCHEMA)
+        self.read_conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(db_file))}?mode=ro", uri=True, check_same_thread=False)
+        self.synced = OrderedDict()
+        legacy_json = os.path.splitext(db_file)[0] + ".json"
+        if first_use and os.path.exists(legacy_json):
+            with open(legacy_json, 'r') as f:
+                try: self.write_all(json.load(f))
+                except json.JSONDecodeError: pass
+
+    def version(self):
+        with self.lock:
+            row = self.read_conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            return int(row[0]) if row else 0
+
+    def version_token(self):
+        return self.version()
+
+    # --- Reading ---
+    def load(self):
+        with self.lock:
+            q = self.read_conn.execute
+            version = q("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            data = {}
+            for name, champion, key_order, extra in q("SELECT name, champion, key_order, extra FROM categories ORDER BY position"):
+                cat = _join_row(_CATEGORY_KEYS, {"champion": champion}, key_order, extra)
+                if "teams" in cat and cat["teams"] is None: cat["teams"] = {}
+                for key in ("team_results", "individual_matches", "knockout", "knockout_individual_matches"):
+                    if key in cat and cat[key] is None: cat[key] = []
+                data[name] = cat
+            players = {}
+            for category, team, name in q("SELECT category, team, name FROM players ORDER BY category, team, position"):
+                players.setdefault((category, team), []).append(name)
+            cols = ", ".join(_TEAM_COLUMNS.values())
+            for row in q(f"SELECT category, name, key_order, extra, {cols} FROM teams ORDER BY category, position"):
+                category, name, key_order, extra = row[:4]
+                columns = dict(zip(_TEAM_COLUMNS, row[4:])); columns["players"] = players.get((category, name), [])
+                self._target(data, category, "teams", {})[name] = _join_row(_TEAM_KEYS, columns, key_order, extra)
+            for table, key in (("individual_matches", "individual_matches"), ("knockout_matches", "knockout_individual_matches")):
+                for row in q(f"SELECT category, key_order, extra, {', '.join(_MATCH_KEYS)} FROM {table} ORDER BY category, seq"):
+                    self._target(data, row[0], key, []).append(_join_row(_MATCH_KEYS, dict(zip(_MATCH_KEYS, row[3:])), row[1], row[2]))
+            for category, key_order, extra, team1, team2, winner, score in q("SELECT category, key_order, extra, team1, team2, winner, score FROM team_results ORDER BY category, seq"):
+                self._target(data, category, "team_results", []).append(_join_row(_RESULT_KEYS, {"teams": [team1, team2], "winner": winner, "score": score}, key_order, extra))
+            for category, rnd, team_a, team_b in q("SELECT category, round, team_a, team_b FROM knockout_rounds ORDER BY category, round, position"):
+                rounds = self._target(data, category, "knockout", [])
+                while len(rounds) <= rnd: rounds.append([])
+                rounds[rnd].append([team_a, team_b])
+            data = logic._tracked(data)
+            self._mark_synced(data, int(version[0]) if version else 0)
+            return data
+
+    @staticmethod
+    def _target(data, category, key, empty):
+        cat = data[category]
+        if cat.get(key) is None: cat[key] = empty
+        return cat[key]
+
+    # --- Writing ---
+    def _mark_synced(self, data, version):
+        self.synced[id(data)] = (data, version); self.synced.move_to_end(id(data))
+        while len(self.synced) > 8: self.synced.popitem(last=False)
+
+    def save(self, data, records):
+        with self.lock:
+            entry = self.synced.get(id(data))
+            if entry is None or entry[0] is not data or entry[1] != self.version(): return self.write_all(data)
+            if not records: return
+            with self.conn:
+                cur = self.conn.cursor()
+                by_category = OrderedDict()
+                for record in records:
+                    if record['op'] == "delete_category":
+                        self._delete_category(cur, record['cat']); by_category.pop(record['cat'], None)
+                    else: by_category.setdefault(record['cat'], []).append(record)
+                for name, ops in by_category.items():
+                    if name not in data: continue
+                    if any(r['op'] == "init_category" for r in ops) or not {r['op'] for r in ops} <= _INCREMENTAL_OPS:
+                        self._write_category(cur, name, data[name])
+                    else: self._sync_category(cur, name, data[name], ops)
+                self._bump_version(cur)
+            self._mark_synced(data, self.version())
+
+    def write_all(self, data):
+        """Replaces the whole database with `data`."""
+        with self.lock:
+            with self.conn:
+                cur = self.conn.cursor()
+                for table in ("categories", "teams", "players", "individual_matches", "knockout_matches", "team_results", "knockout_rounds"):
+                    cur.execute(f"DELETE FROM {table}")
+                for name, cat in data.items(): self._write_category(cur, name, cat)
+                self._bump_version(cur)
+            logic._take_mutations(data)
+            self._mark_synced(data, self.version())
+
+    def _bump_version(self, cur):
+        cur.execute("INSERT INTO meta (key, value) VALUES ('version', '1') ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+
+    def _delete_category(self, cur, name):
+        cur.execute("DELETE FROM categories WHERE name = ?", (name,))
+        for table in ("teams", "players", "individual_matches", "knockout_matches", "team_results", "knockout_rounds"):
+            cur.execute(f"DELETE FROM {table} WHERE category = ?", (name,))
+
+    def _write_category(self, cur, name, cat):
+        position = cur.execute("SELECT position FROM categories WHERE name = ?", (name,)).fetchone()
+        self._delete_category(cur, name)
+        if position is None: position = cur.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM categories").fetchone()
+        self._write_category_row(cur, name, cat, position[0])
+        for team_name in cat.get('teams') or {}: self._upsert_team(cur, name, team_name, cat['teams'][team_name])
+        self._append_rows(cur, name, cat)
+        self._append_rounds(cur, name, cat)
+
+    def _write_category_row(self, cur, name, cat, position=None):
+        # List-valued keys live in their own tables; only their presence and order is kept here.
+        is_column = lambda k, v: k in _CATEGORY_KEYS and (k == "champion" and isinstance(v, _SCALARS) or k == "teams" and isinstance(v, dict) or isinstance(v, list) and k != "champion")
+        columns, _, extra = _split_row(cat, _CATEGORY_KEYS, is_column)
+        if position is None:
+            cur.execute("UPDATE categories SET champion = ?, key_order = ?, extra = ? WHERE name = ?", (columns.get("champion"), _dump_compact(list(cat)), extra, name))
+        else:
+            cur.execute("INSERT INTO categories (name, position, champion, key_order, extra) VALUES (?, ?, ?, ?, ?)", (name, position, columns.get("champion"), _dump_compact(list(cat)), extra))
+
+    def _upsert_team(self, cur, category, team_name, team):
+        columns, key_order, extra = _split_row(team, _TEAM_KEYS, _is_team_column)
+        values = [columns.get(k) for k in _TEAM_COLUMNS]
+        cur.execute(f"""INSERT INTO teams (category, name, position, key_order, extra, {', '.join(_TEAM_COLUMNS.values())})
+                        VALUES (?, ?, (SELECT COALESCE(MAX(position) + 1, 0) FROM teams WHERE category = ?), ?, ?, {', '.join('?' * len(_TEAM_COLUMNS))})
+                        ON CONFLICT(category, name) DO UPDATE SET key_order = excluded.key_order, extra = excluded.extra,
+                        {', '.join(f'{c} = excluded.{c}' for c in _TEAM_COLUMNS.values())}""",
+                    (category, team_name, category, key_order, extra, *values))
+        cur.execute("DELETE FROM players WHERE category = ? AND team = ?", (category, team_name))
+        cur.executemany("INSERT INTO players (category, team, position, name) VALUES (?, ?, ?, ?)",
+                        [(category, team_name, i, p) for i, p in enumerate(columns.get("players", []))])
+
+    def _append_rows(self, cur, category, cat):
+        """Inserts the list entries the database does not have yet; returns the teams they involve."""
+        touched = set()
+        for table, key, keys, is_column in (("individual_matches", "individual_matches", _MATCH_KEYS, _is_match_column),
+                                            ("knockout_matches", "knockout_individual_matches", _MATCH_KEYS, _is_match_column),
+                                            ("team_results", "team_results", _RESULT_KEYS, _is_result_column)):
+            stored, next_seq = cur.execute(f"SELECT COUNT(*), COALESCE(MAX(seq) + 1, 0) FROM {table} WHERE category = ?", (category,)).fetchone()
+            rows = []
+            for i, item in enumerate((cat.get(key) or [])[stored:]):
+                columns, key_order, extra = _split_row(item, keys, is_column)
+                if table == "team_results":
+                    team1, team2 = columns.pop("teams", (None, None)); columns.update(team1=team1, team2=team2)
+                    names = ("team1", "team2", "winner", "score")
+                else: names = _MATCH_KEYS
+                touched.update(t for t in (columns.get("team1"), columns.get("team2")) if t)
+                rows.append((category, next_seq + i, key_order, extra, *(columns.get(c) for c in names)))
+            if rows:
+                cols = "team1, team2, winner, score" if table == "team_results" else ", ".join(_MATCH_KEYS)
+                cur.executemany(f"INSERT INTO {table} (category, seq, key_order, extra, {cols}) VALUES ({', '.join('?' * len(rows[0]))})", rows)
+        return touched
+
+    def _append_rounds(self, cur, category, cat):
+        stored = cur.execute("SELECT COALESCE(MAX(round) + 1, 0) FROM knockout_rounds WHERE category = ?", (category,)).fetchone()[0]
+        cur.executemany("INSERT INTO knockout_rounds (category, round, position, team_a, team_b) VALUES (?, ?, ?, ?, ?)",
+                        [(category, r, i, m[0], m[1]) for r, matchups in enumerate(cat.get('knockout') or []) if r >= stored for i, m in enumerate(matchups)])
+
+    def _sync_category(self, cur, name, cat, ops):
+        teams = cat.get('teams') or {}
+        dirty = {r['name'] for r in ops if r['op'] == "register_team"}
+        for r in ops:
+            if r['op'] == "delete_team":
+                cur.execute("DELETE FROM teams WHERE category = ? AND name = ?", (name, r['name']))
+                cur.execute("DELETE FROM players WHERE category = ? AND team = ?", (name, r['name']))
+                cur.execute("DELETE FROM individual_matches WHERE category = ? AND (team1 = ? OR team2 = ?)", (name, r['name'], r['name']))
+                cur.execute("DELETE FROM team_results WHERE category = ?", (name,))  # re-derived from the remaining matches
+                dirty.update(teams)
+        if any(r['op'] in ("knockout", "reset_knockout") for r in ops):
+            cur.execute("DELETE FROM knockout_rounds WHERE category = ?", (name,)); cur.execute("DELETE FROM knockout_matches WHERE category = ?", (name,))
+        dirty |= self._append_rows(cur, name, cat)
+        self._append_rounds(cur, name, cat)
+        for team_name in dirty:
+            if team_name in teams: self._upsert_team(cur, name, team_name, teams[team_name])
+        self._write_category_row(cur, name, cat)
+
+
+def migrate_json_to_sqlite(json_file, db_file):
+    with open(json_file, 'r') as f: data = json.load(f)
+    SqliteStore(db_file).write_all(data)
+
+
+def export_sqlite_to_json(db_file, json_file):
+    with open(json_file, 'w') as f: json.dump(SqliteStore(db_file).load(), f, indent=4)
+
+
+def pack_json_file(json_file, packed_file):
+    with open(json_file, 'r') as f: data = json.load(f)
+    _write_atomic(packed_file, _dump_compact(pack_data(data)))
+
+
+def unpack_json_file(packed_file, json_file):
+    with open(packed_file, 'r', encoding='utf-8') as f: data = unpack_data(json.load(f))
+    with open(json_file, 'w') as f: json.dump(data, f, indent=4)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Convierte un torneo entre JSON, SQLite y el formato compacto.")
+    parser.add_argument("direction", choices=["json-to-sqlite", "sqlite-to-json", "json-to-packed", "packed-to-json"])
+    parser.add_argument("source"); parser.add_argument("target")
+    args = parser.parse_args()
+    {"json-to-sqlite": migrate_json_to_sqlite, "sqlite-to-json": export_sqlite_to_json,
+     "json-to-packed": pack_json_file, "packed-to-json": unpack_json_file}[args.direction](args.source, args.target)